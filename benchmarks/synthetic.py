@@ -0,0 +1,143 @@
+import base64
+import random
+import struct
+import zlib
+from typing import List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from pobapi.constants import SET_MAP, STATS_MAP, TREE_OFFSET
+
+"""Generator for synthetic Path Of Building documents of configurable size."""
+
+GEMS = [
+    ("Arc", "Arc", False),
+    ("Fireball", "Fireball", False),
+    ("Vaal Arc", "VaalArc", False),
+    ("Herald of Ash", "HeraldOfAsh", False),
+    ("Added Cold Damage", "SupportAddedColdDamage", True),
+    ("Concentrated Effect", "SupportConcentratedEffect", True),
+    ("Spell Echo", "SupportSpellEcho", True),
+    ("Empower", "SupportEmpower", True),
+]
+BASES = ["Sadist Garb", "Goathide Boots", "Vaal Regalia", "Two-Stone Ring"]
+# Item mods, the ones with ranges are rolled with a ModRange element.
+MODS = [
+    "+(20-30) to Strength",
+    "Adds (10-15) to (20-25) Fire Damage",
+    "(4-6)% increased maximum Life",
+    "15% increased Movement Speed",
+]
+CONFIG = (
+    '<Input name="buffFortify" boolean="true"/>'
+    '<Input name="enemyIsBoss" string="SHAPER"/>'
+    '<Input name="enemyLevel" number="83"/>'
+    '<Input name="usePowerCharges" boolean="true"/>'
+)
+
+
+def generate(
+    items: int = 30,
+    skill_groups: int = 8,
+    trees: int = 2,
+    tree_nodes: int = 120,
+    notes: int = 2000,
+    seed: int = 0,
+) -> bytes:
+    """Generate a Path Of Building XML document.
+
+    :param items: Number of items.
+    :param skill_groups: Number of skill groups, each with 4 gems.
+    :param trees: Number of passive skill tree specs.
+    :param tree_nodes: Number of allocated nodes per tree.
+    :param notes: Length of the build notes in characters.
+    :param seed: Random seed, documents are reproducible.
+    :return: XML document."""
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<PathOfBuilding>']
+    parts.append(
+        '<Build level="95" bandit="None" className="Witch" '
+        'ascendClassName="Elementalist" mainSocketGroup="1">'
+    )
+    for stat in STATS_MAP:
+        parts.append(f'<PlayerStat stat="{stat}" value="{rng.uniform(0, 1e5)}"/>')
+    parts.append("</Build>")
+    parts.append("<Skills>")
+    for _ in range(skill_groups):
+        parts.append('<Skill label="" enabled="true" mainActiveSkill="1">')
+        # Active skill gems come first, like in Path Of Building.
+        gems = sorted(rng.sample(GEMS, 4), key=lambda gem: gem[2])
+        for name, skill_id, support in gems:
+            prefix = "Support" if support else "Skill"
+            parts.append(
+                f'<Gem nameSpec="{name}" skillId="{skill_id}" '
+                f'gemId="Metadata/Items/Gems/{prefix}Gem{skill_id}" '
+                f'level="{rng.randint(1, 21)}" quality="{rng.randint(0, 23)}" '
+                'enabled="true"/>'
+            )
+        parts.append("</Skill>")
+    parts.append("</Skills>")
+    parts.append('<Tree activeSpec="1">')
+    for _ in range(trees):
+        url = tree_url(rng.sample(range(1, 2**16), tree_nodes))
+        parts.append(f"<Spec><URL>{url}</URL><Sockets>")
+        parts.append('<Socket nodeId="7960" itemId="1"/></Sockets></Spec>')
+    parts.append("</Tree>")
+    words = "".join(rng.choice("abcdefghij ") for _ in range(notes))
+    parts.append(f"<Notes>{escape(words)}</Notes>")
+    parts.append('<Items activeItemSet="1" useSecondWeaponSet="false">')
+    for id_ in range(1, items + 1):
+        text, ranges = _item_text(rng)
+        parts.append(f'<Item id="{id_}">{escape(text)}')
+        for index, value in enumerate(ranges, 1):
+            parts.append(f'<ModRange range="{value}" id="{index}"/>')
+        parts.append("</Item>")
+    parts.append('<ItemSet id="1">')
+    for slot in SET_MAP:
+        item_id = rng.randint(0, items)
+        parts.append(f'<Slot name={quoteattr(slot)} itemId="{item_id}"/>')
+    parts.append("</ItemSet></Items>")
+    parts.append(f"<Config>{CONFIG}</Config>")
+    parts.append("</PathOfBuilding>")
+    return "\n".join(parts).encode()
+
+
+def _item_text(rng: random.Random) -> Tuple[str, List[float]]:
+    """Generate the text of a rare item.
+
+    :return: Item text and values of its ranged mods."""
+    lines = [
+        "Rarity: RARE",
+        f"Synthetic {rng.randint(0, 10**6)}",
+        rng.choice(BASES),
+        f"Unique ID: {rng.getrandbits(128):032x}",
+        f"Item Level: {rng.randint(1, 86)}",
+        f"Quality: {rng.randint(0, 20)}",
+        "Sockets: R-G-B B",
+        f"LevelReq: {rng.randint(1, 68)}",
+        "Implicits: 0",
+    ]
+    ranges = []
+    for mod in MODS:
+        if "(" in mod:
+            ranges.append(round(rng.random(), 3))
+            mod = f"{{range:{ranges[-1]}}}{mod}"
+        lines.append(mod)
+    return "\n".join(lines), ranges
+
+
+def tree_url(nodes: List[int]) -> str:
+    """Build a pathofexile.com passive skill tree link.
+
+    :return: Passive skill tree link."""
+    header = struct.pack("!IBBB", 4, 0, 0, 0)[:TREE_OFFSET]
+    data = header + struct.pack(f"!{len(nodes)}H", *nodes)
+    return "https://www.pathofexile.com/passive-skill-tree/" + (
+        base64.urlsafe_b64encode(data).decode()
+    )
+
+
+def import_code(xml: bytes) -> str:
+    """Compress and encode an XML document like Path Of Building does.
+
+    :return: Import code."""
+    return base64.urlsafe_b64encode(zlib.compress(xml)).decode()
@@ -0,0 +1,163 @@
+import subprocess
+import sys
+import tracemalloc
+from typing import Callable
+
+import pytest
+
+from benchmarks import synthetic
+from pobapi import api, bulk, util
+
+"""Benchmarks over synthetic build documents.
+
+Run with ``pytest benchmarks --benchmark-autosave`` and compare against a
+previous run with ``--benchmark-compare --benchmark-compare-fail=mean:10%``."""
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = {
+    "small": dict(items=5, skill_groups=3, trees=1, tree_nodes=40, notes=100),
+    "medium": dict(items=30, skill_groups=8, trees=2, tree_nodes=120, notes=2000),
+    "large": dict(items=80, skill_groups=20, trees=6, tree_nodes=250, notes=20000),
+}
+PROPERTIES = list(api._SECTIONS)
+#: Minimum throughput of decoding, editing and re-encoding builds, in MB of XML/s.
+ROUND_TRIP_TARGET = 10.0
+
+
+@pytest.fixture(scope="module", params=list(SIZES))
+def document(request):
+    xml = synthetic.generate(**SIZES[request.param])
+    return xml, synthetic.import_code(xml)
+
+
+def _record(benchmark, xml: bytes, run: Callable[[], object], builds: int = 1):
+    """Add throughput and peak memory to a benchmark's results.
+
+    Peak memory is measured with tracemalloc over one extra, untimed call of run.
+    It covers Python allocations of this process, not those of libxml2 or of
+    worker processes."""
+    benchmark.extra_info["xml_bytes"] = len(xml) * builds
+    if benchmark.stats:
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info["builds_per_second"] = builds / mean
+        benchmark.extra_info["mb_per_second"] = len(xml) * builds / mean / 1e6
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_traced_kb"] = peak // 1024
+
+
+def test_decode(benchmark, document):
+    xml, code = document
+    assert benchmark(util._fetch_xml_from_import_code, code) == xml
+    _record(benchmark, xml, lambda: util._fetch_xml_from_import_code(code))
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_parse(benchmark, document, lazy):
+    xml, _ = document
+    benchmark(api.PathOfBuildingAPI, xml, lazy=lazy)
+    _record(benchmark, xml, lambda: api.PathOfBuildingAPI(xml, lazy=lazy))
+
+
+@pytest.mark.parametrize("name", PROPERTIES)
+def test_property(benchmark, document, name):
+    xml, _ = document
+    # Every round gets a fresh instance, so memoization does not hide the cost.
+    benchmark.pedantic(
+        getattr,
+        setup=lambda: ((api.PathOfBuildingAPI(xml), name), {}),
+        rounds=50,
+    )
+    build = api.PathOfBuildingAPI(xml)
+    _record(benchmark, xml, lambda: getattr(build, name))
+
+
+def test_all_properties(benchmark, document):
+    _, code = document
+
+    def parse():
+        build = api.from_import_code(code)
+        for name in PROPERTIES:
+            getattr(build, name)
+
+    benchmark(parse)
+    _record(benchmark, document[0], parse)
+
+
+@pytest.mark.parametrize("level", [1, 6, 9])
+def test_encode(benchmark, document, level):
+    xml, _ = document
+    build = api.PathOfBuildingAPI(xml)
+    benchmark(build.to_import_code, level)
+    _record(benchmark, xml, lambda: build.to_import_code(level))
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_round_trip(benchmark, document, lazy):
+    xml, code = document
+
+    def round_trip():
+        build = api.from_import_code(code, lazy=lazy)
+        build.xml.find("Build").set("level", "90")
+        return build.to_import_code()
+
+    assert api.from_import_code(benchmark(round_trip)).level == 90
+    _record(benchmark, xml, round_trip)
+    if benchmark.stats:
+        assert benchmark.extra_info["mb_per_second"] >= ROUND_TRIP_TARGET
+
+
+@pytest.mark.parametrize("workers", [1, None], ids=["serial", "parallel"])
+def test_parse_many(benchmark, document, workers):
+    xml, code = document
+    codes = [code] * 200
+    results = benchmark.pedantic(
+        bulk.parse_many, (codes,), {"workers": workers}, rounds=3
+    )
+    assert all(result.error is None for result in results)
+    _record(benchmark, xml, lambda: bulk.parse_many(codes, workers=workers), len(codes))
+
+
+@pytest.mark.parametrize("module", ["pobapi", "pobapi.api"])
+def test_import(benchmark, module):
+    # Includes interpreter startup, as paid by every short-lived process.
+    # tests/test_imports.py enforces a budget on the import alone.
+    benchmark.pedantic(
+        subprocess.run,
+        ([sys.executable, "-c", f"import {module}"],),
+        {"check": True},
+        rounds=20,
+    )
+
+
+@pytest.fixture(scope="module")
+def similarity_index():
+    np = pytest.importorskip("numpy")
+    from pobapi import similarity
+
+    rng = np.random.default_rng(0)
+    builds, archetypes = 10**6, 1000
+    dimensions = len(similarity.SIMILARITY_STATS) + len(similarity.KEYSTONES)
+    features = rng.standard_normal((builds, dimensions), np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    # Builds of an archetype share most of their signature.
+    signatures = rng.integers(0, 2**32, (archetypes, 64), np.uint32)[
+        np.arange(builds) % archetypes
+    ]
+    noise = rng.random(signatures.shape) < 0.1
+    signatures[noise] = rng.integers(0, 2**32, noise.sum(), np.uint32)
+    columns = similarity.SIMILARITY_STATS
+    return similarity.SimilarityIndex(
+        features, signatures, columns, np.zeros(len(columns)), np.ones(len(columns))
+    )
+
+
+@pytest.mark.parametrize("exact", [False, True], ids=["lsh", "exact"])
+def test_nearest(benchmark, similarity_index, exact):
+    rows, _ = benchmark(similarity_index.nearest, 12345, 10, exact=exact)
+    assert len(rows) == 10
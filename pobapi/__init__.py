@@ -1,10 +1,67 @@
 import logging
-
-from .api import *
+from importlib import import_module
 
 VERSION = "0.6.0"
 PROJECT = "Path Of Building API"
 COPYRIGHT = "2020, Peter Pölzl"
 AUTHOR = "Peter Pölzl"
 
+#: Public names and the submodules defining them, imported on first access,
+#: so ``import pobapi`` does not pay for lxml, requests or asyncio up front.
+_EXPORTS = {
+    "PastebinClient": "aio",
+    "from_url_async": "aio",
+    "fetch_many": "aio",
+    "PathOfBuildingAPI": "api",
+    "from_url": "api",
+    "from_import_code": "api",
+    "ParseResult": "bulk",
+    "parse_many": "bulk",
+    "iter_parse": "bulk",
+    "encode_many": "bulk",
+    "iter_encode": "bulk",
+    "BuildDiff": "compare",
+    "TreeDiff": "compare",
+    "diff": "compare",
+}
+#: Submodules available as attributes without importing them first.
+_SUBMODULES = frozenset(
+    {
+        "aio",
+        "api",
+        "bulk",
+        "cache",
+        "compare",
+        "config",
+        "constants",
+        "corpus",
+        "index",
+        "models",
+        "profiling",
+        "similarity",
+        "snapshot",
+        "stats",
+        "tables",
+        "util",
+    }
+)
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS, *_SUBMODULES})
+
+
 logging.getLogger(__name__).addHandler(logging.NullHandler())
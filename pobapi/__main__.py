@@ -0,0 +1,252 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import fields as dataclass_fields
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pobapi.bulk import iter_parse
+from pobapi.stats import Stats
+
+"""Command-line interface.
+
+Scan import codes and write selected fields of each build as JSON lines or CSV::
+
+    python -m pobapi scan builds/ codes.jsonl.gz -f csv -o builds.csv
+
+Run ``python -m pobapi scan --help`` for all options."""
+
+__all__ = ["main"]
+
+#: Fields that can be written by the scan command.
+SCAN_FIELDS = ("class_name", "ascendancy_name", "level", "stats", "keystones")
+#: Stats written by the scan command by default.
+DEFAULT_STATS = ("life", "energy_shield", "mana", "total_dps")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command-line interface.
+
+    :param argv: Command-line arguments, defaults to :data:`sys.argv`.
+    :return: Exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pobapi", description="Path Of Building API"
+    )
+    commands = parser.add_subparsers(dest="command")
+    scan = commands.add_parser(
+        "scan",
+        help="Parse import codes and write selected fields of each build.",
+        description="Parse import codes in parallel and write selected fields "
+        "of each build as JSON lines or CSV, in input order.",
+    )
+    scan.add_argument(
+        "paths",
+        nargs="*",
+        default=["-"],
+        help="Files or directories to read import codes from, one per line, "
+        "'-' for standard input (default). Files ending in .gz are decompressed, "
+        "lines of .jsonl files are JSON objects holding an import code.",
+    )
+    scan.add_argument(
+        "--key",
+        default="import_code",
+        help="Key of the import code in .jsonl objects (default: %(default)s).",
+    )
+    scan.add_argument(
+        "--fields",
+        default=",".join(SCAN_FIELDS),
+        help="Comma-separated fields to write (default: %(default)s).",
+    )
+    scan.add_argument(
+        "--stats",
+        default=",".join(DEFAULT_STATS),
+        help="Comma-separated stats to write (default: %(default)s).",
+    )
+    scan.add_argument("-f", "--format", choices=("jsonl", "csv"), default="jsonl")
+    scan.add_argument(
+        "-o", "--output", default="-", help="Output file, '-' for stdout."
+    )
+    scan.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    scan.add_argument(
+        "--chunksize",
+        type=int,
+        default=64,
+        help="Import codes sent to a worker at once (default: %(default)s).",
+    )
+    scan.add_argument(
+        "--window",
+        type=int,
+        default=4096,
+        help="Maximum import codes in flight (default: %(default)s).",
+    )
+    scan.add_argument(
+        "-q", "--quiet", action="store_true", help="Do not report throughput."
+    )
+    args = parser.parse_args(argv)
+    if args.command != "scan":
+        parser.print_help()
+        return 2
+    fields = [field for field in args.fields.split(",") if field]
+    unknown = set(fields) - set(SCAN_FIELDS)
+    if unknown:
+        parser.error(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    stats = [stat for stat in args.stats.split(",") if stat]
+    unknown = set(stats) - {field.name for field in dataclass_fields(Stats)}
+    if unknown:
+        parser.error(f"Unknown stats: {', '.join(sorted(unknown))}.")
+    if args.output == "-":
+        return _scan(args, fields, stats, sys.stdout)
+    with open(args.output, "w", newline="", encoding="utf-8") as output:
+        return _scan(args, fields, stats, output)
+
+
+def _scan(
+    args: argparse.Namespace, fields: List[str], stats: List[str], output: IO[str]
+) -> int:
+    """Parse import codes and write the records of their builds.
+
+    :return: Exit status."""
+    sources: Deque[Tuple[str, Optional[str]]] = deque()
+
+    def _codes() -> Iterator[str]:
+        for source, import_code, error in _read(args.paths, args.key):
+            sources.append((source, error))
+            # Unreadable lines pass through as empty import codes to keep their order.
+            yield import_code
+
+    write = _writer(args.format, fields, stats, output)
+    start = time.perf_counter()
+    total = failed = 0
+    results = iter_parse(_codes(), fields, args.workers, args.chunksize, args.window)
+    for result in results:
+        source, error = sources.popleft()
+        record = {"source": source}
+        if error is None and result.error is None:
+            record.update(_record(result.values, stats))
+        else:
+            failed += 1
+            record["error"] = error or result.error
+        write(record)
+        total += 1
+    seconds = time.perf_counter() - start
+    if not args.quiet:
+        print(
+            f"Parsed {total} import codes ({failed} failed) in {seconds:.2f} s, "
+            f"{total / seconds if seconds else 0:.1f} import codes/s.",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _read(paths: Iterable[str], key: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Read import codes from files, directories and standard input.
+
+    :return: Generator for tuples of (<path>:<line number>, <import code>, <error>),
+        see :func:`_read_lines`."""
+    for path in paths:
+        if path == "-":
+            yield from _read_lines("<stdin>", sys.stdin, key, False)
+        elif os.path.isdir(path):
+            for directory, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield from _read_file(os.path.join(directory, name), key)
+        else:
+            yield from _read_file(path, key)
+
+
+def _read_file(path: str, key: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Read import codes from a file, decompressing it if it ends in .gz.
+
+    :return: Generator for tuples of (<path>:<line number>, <import code>, <error>),
+        see :func:`_read_lines`."""
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+        jsonl = path[:-3].endswith(".jsonl")
+    else:
+        f = open(path, encoding="utf-8")
+        jsonl = path.endswith(".jsonl")
+    with f:
+        yield from _read_lines(path, f, key, jsonl)
+
+
+def _read_lines(
+    source: str, lines: Iterable[str], key: str, jsonl: bool
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Read import codes from lines, skipping blank ones.
+
+    :return: Generator for tuples of (<source>:<line number>, <import code>, <error>),
+        with an empty import code and an error message for unreadable lines."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        error = None
+        if jsonl:
+            try:
+                value = json.loads(line)
+                line = value[key] if isinstance(value, dict) else value
+                if not isinstance(line, str):
+                    raise TypeError(f"Import code is a {type(line).__name__}.")
+            except json.JSONDecodeError as e:
+                line, error = "", f"Invalid JSON: {e}"
+            except (KeyError, TypeError) as e:
+                line, error = "", f"{type(e).__name__}: {e}"
+        yield f"{source}:{number}", line, error
+
+
+def _record(values: Dict[str, Any], stats: List[str]) -> Dict[str, Any]:
+    """Convert extracted properties to JSON-serializable values.
+
+    :return: Dictionary of {<field> : <value>}."""
+    record = {}
+    for field, value in values.items():
+        if field == "stats":
+            record[field] = {stat: getattr(value, stat) for stat in stats}
+        elif field == "keystones":
+            record[field] = list(value)
+        else:
+            record[field] = value
+    return record
+
+
+def _writer(format_: str, fields: List[str], stats: List[str], output: IO[str]):
+    """Get a function writing a record in the given format.
+
+    :return: Function taking a record."""
+    if format_ == "jsonl":
+
+        def _write_jsonl(record: Dict[str, Any]) -> None:
+            output.write(json.dumps(record) + "\n")
+
+        return _write_jsonl
+    columns = ["source"]
+    for field in fields:
+        if field == "stats":
+            columns.extend(stats)
+        else:
+            columns.append(field)
+    columns.append("error")
+    writer = csv.DictWriter(output, columns)
+    writer.writeheader()
+
+    def _write_csv(record: Dict[str, Any]) -> None:
+        record.update(record.pop("stats", ()))
+        if "keystones" in record:
+            record["keystones"] = "|".join(record["keystones"])
+        writer.writerow(record)
+
+    return _write_csv
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pobapi.api import PathOfBuildingAPI
+from pobapi.util import (
+    PASTEBIN_URL,
+    _fetch_xml_from_import_code,
+    _log_request_error,
+    _raw_url,
+)
+
+"""Asynchronous interface for fetching Path Of Building pastebins."""
+
+__all__ = ["PastebinClient", "from_url_async", "fetch_many"]
+
+logger = logging.getLogger(__name__)
+
+#: HTTP status codes worth retrying a request for.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class PastebinClient:
+    """Asynchronous client for pastebin.com links generated with Path Of Building.
+
+    Requests are made with a pooled :class:`requests.Session` on a thread pool,
+    so failures are classified and logged exactly like :func:`~pobapi.api.from_url`.
+
+    :param concurrency: Maximum number of requests in flight.
+    :param rate: Maximum number of requests per second and host, unlimited if None.
+    :param retries: Number of retries after timeouts, network problems
+        and HTTP status codes in :data:`RETRY_STATUS_CODES`.
+    :param backoff: Delay before the first retry in seconds, doubled on every retry.
+    :param timeout: Timeout for each request.
+    :param base_url: Pastebin base URL, e.g. of a local server for testing.
+
+    .. note:: Use as an asynchronous context manager or call
+        :meth:`close` when done."""
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 6.0,
+        base_url: str = PASTEBIN_URL,
+    ):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(concurrency)
+        # Created on first use, so they are bound to the running event loop.
+        self._semaphore = None
+        self._next_slot: Dict[str, float] = {}
+
+    async def __aenter__(self) -> "PastebinClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections and shut down the thread pool."""
+        self._session.close()
+        self._executor.shutdown(wait=False)
+
+    async def fetch(self, url: str) -> Optional[bytes]:
+        """Get a Path Of Building import code shared with pastebin.com.
+
+        :return: Decompressed XML build document, None if the request failed."""
+        if not url.startswith(self.base_url):
+            logger.exception(f"{url} is not a valid pastebin.com URL.")
+            return None
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        raw = _raw_url(url, self.base_url)
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                await self._throttle(urlsplit(raw).netloc)
+                try:
+                    text = await loop.run_in_executor(self._executor, self._get, raw)
+                except requests.RequestException as e:
+                    if attempt < self.retries and _is_transient(e):
+                        await asyncio.sleep(self.backoff * 2**attempt)
+                        continue
+                    _log_request_error(url, self.timeout)
+                    return None
+                break
+        return await loop.run_in_executor(
+            self._executor, _fetch_xml_from_import_code, text
+        )
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[Optional[bytes]]:
+        """Get many Path Of Building import codes shared with pastebin.com.
+
+        :return: Decompressed XML build documents, in the same order as the links.
+            None for links whose request failed."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def _get(self, raw: str) -> str:
+        """Request a raw paste on the pooled session.
+
+        :return: Paste contents."""
+        request = self._session.get(raw, timeout=self.timeout)
+        request.raise_for_status()
+        return request.text
+
+    async def _throttle(self, host: str) -> None:
+        """Wait until the next request to a host is allowed by the rate limit."""
+        if self.rate is None:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _is_transient(error: requests.RequestException) -> bool:
+    """Check whether a failed request is worth retrying.
+
+    :return: Truth value."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and (
+            error.response.status_code in RETRY_STATUS_CODES
+        )
+    return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+
+async def from_url_async(
+    url: str, timeout: float = 6.0, client: Optional[PastebinClient] = None
+) -> PathOfBuildingAPI:
+    """Asynchronously instantiate build class from a pastebin.com link
+    generated with Path Of Building.
+
+    :param url: pastebin.com link generated with Path Of Building.
+    :param timeout: Timeout for the request, if no client is given.
+    :param client: Client to share connections and limits with."""
+    if client is None:
+        async with PastebinClient(timeout=timeout) as client:
+            return PathOfBuildingAPI(await client.fetch(url))
+    return PathOfBuildingAPI(await client.fetch(url))
+
+
+async def fetch_many(
+    urls: Iterable[str], client: Optional[PastebinClient] = None
+) -> List[Optional[PathOfBuildingAPI]]:
+    """Asynchronously instantiate build classes from many pastebin.com links
+    generated with Path Of Building.
+
+    :param urls: pastebin.com links generated with Path Of Building.
+    :param client: Client to share connections and limits with.
+    :return: Builds, in the same order as the links. None for failed requests.
+    :rtype: :class:`~typing.List`\\[:data:`~typing.Optional`\\
+        [:class:`~pobapi.api.PathOfBuildingAPI`]]"""
+    if client is None:
+        async with PastebinClient() as client:
+            return await fetch_many(urls, client)
+    documents = await client.fetch_many(urls)
+    return [PathOfBuildingAPI(xml) if xml else None for xml in documents]
@@ -1,27 +1,78 @@
-from typing import List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from lxml.etree import fromstring
-from unstdlib.standard.functools_ import memoized_property
+from lxml.etree import _Element, fromstring
 from unstdlib.standard.list_ import listify
 
-from pobapi import config, constants, models, stats
+from pobapi import constants, models
+from pobapi.profiling import _stage
 from pobapi.util import (
+    _encode_import_code,
     _fetch_xml_from_import_code,
     _fetch_xml_from_url,
-    _get_stat,
+    _get_stats,
     _get_text,
+    _intern,
+    _iterparse_sections,
+    _LazyDocument,
+    _parse_import_code,
+    _section_digests,
+    _serialize,
     _skill_tree_nodes,
+    memoized_property,
 )
 
+if TYPE_CHECKING:
+    from pobapi import config, stats
+    from pobapi.cache import Cache
+    from pobapi.snapshot import Snapshot
+
 """API for PathOfBuilding's XML export format."""
 
 __all__ = ["PathOfBuildingAPI", "from_url", "from_import_code"]
 
+#: Top-level XML sections each property of :class:`PathOfBuildingAPI` depends on.
+_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "class_name": ("Build",),
+    "ascendancy_name": ("Build",),
+    "level": ("Build",),
+    "bandit": ("Build",),
+    "active_skill_group": ("Build", "Skills"),
+    "stats": ("Build",),
+    "skill_groups": ("Skills",),
+    "active_skill": ("Build", "Skills"),
+    "skill_gems": ("Skills",),
+    "active_skill_tree": ("Tree",),
+    "trees": ("Tree",),
+    "keystones": ("Tree",),
+    "notes": ("Notes",),
+    "second_weapon_set": ("Items",),
+    "items": ("Items",),
+    "active_item_set": ("Items",),
+    "item_sets": ("Items",),
+    "config": ("Build", "Config"),
+}
+
 
 class PathOfBuildingAPI:
     """Instances of this class are single Path Of Building pastebins.
 
     :param xml: Path of Building XML document in byte format.
+    :param sections: Top-level XML sections to keep, e.g. ("Build", "Tree").
+        If given, the document is parsed incrementally and all other sections are
+        discarded while parsing. Properties relying on them are unavailable.
+    :param lazy: Whether to only index the document's top-level sections and
+        parse each of them when a property first needs it.
 
     .. note:: XML must me in byte format, not string format.
         This is required because the XML contains encoding information.
@@ -30,8 +81,97 @@ class PathOfBuildingAPI:
         :func:`~pobapi.api.from_url` or
         :func:`~pobapi.api.from_import_code`, respectively."""
 
-    def __init__(self, xml: bytes):
-        self.xml = fromstring(xml)
+    def __init__(
+        self, xml: bytes, sections: Optional[Collection[str]] = None, lazy: bool = False
+    ):
+        if lazy:
+            self.xml = _LazyDocument(xml, sections)
+            return
+        with _stage("parse"):
+            if sections is None:
+                self.xml = fromstring(xml)
+            else:
+                self.xml = _iterparse_sections(xml, sections)
+
+    @classmethod
+    def _from_element(cls, root: _Element) -> "PathOfBuildingAPI":
+        """Instantiate build class from an already parsed XML document.
+
+        :return: Build class."""
+        build = cls.__new__(cls)
+        build.xml = root
+        return build
+
+    def reparse(self, xml: bytes) -> "PathOfBuildingAPI":
+        """Instantiate build class from an edited version of this build's document.
+
+        The new document is parsed lazily and properties already computed on this
+        build are reused if the top-level sections they depend on are unchanged.
+        Sections are compared by digests of their raw bytes if this build was
+        parsed lazily, by digests of their serialization otherwise.
+
+        .. note:: Reused property values are shared between both builds.
+
+        :param xml: Path of Building XML document in byte format.
+        :return: Build class."""
+        build = PathOfBuildingAPI(xml, lazy=True)
+        old = _section_digests(self.xml)
+        if not old:
+            return build
+        if isinstance(self.xml, _LazyDocument):
+            new = _section_digests(build.xml)
+        else:
+            # Parses the new sections, which the new build keeps for later use.
+            new = _section_digests(list(build.xml))
+        for name, sections in _SECTIONS.items():
+            if name in self.__dict__ and all(
+                old.get(section) == new.get(section) for section in sections
+            ):
+                build.__dict__[name] = self.__dict__[name]
+        return build
+
+    def freeze(self) -> "Snapshot":
+        """Compute all properties at once and release the XML document.
+
+        Afterwards, the build answers all properties from memory, so access times
+        are predictable and the parsed document no longer has to be kept alive.
+        Properties that cannot be computed, e.g. because the document lacks
+        their data, are None in the snapshot and raise when accessed on the build.
+
+        :return: Snapshot of the build, holding copies of the values."""
+        from pobapi.snapshot import Snapshot
+
+        snapshot = Snapshot.from_build(self)
+        self.xml = None
+        return snapshot
+
+    def to_xml(self) -> bytes:
+        """Serialize the build's XML document, including changes made to it.
+
+        Edit the elements of :attr:`xml` to modify a build, e.g. gem levels or
+        configuration options. Property values are not written back, use
+        :meth:`reparse` to get updated ones.
+        Sections discarded while parsing, see ``sections``, are missing, also for
+        lazily parsed builds. Sections of lazily parsed builds that were never
+        accessed are copied verbatim.
+
+        :raises: :class:`ValueError` if the build has no XML document, e.g.
+            after :meth:`freeze`.
+
+        :return: Path of Building XML document in byte format."""
+        if self.xml is None:
+            raise ValueError("Build has no XML document to serialize.")
+        return _serialize(self.xml)
+
+    def to_import_code(self, level: int = -1) -> str:
+        """Encode the build as an import code, see :meth:`to_xml`.
+
+        :raises: :class:`ValueError` if the build has no XML document.
+
+        :param level: zlib compression level, from 0 (fastest) to 9 (smallest),
+            -1 for zlib's default.
+        :return: Import code for Path Of Building."""
+        return _encode_import_code(self.to_xml(), level)
 
     @memoized_property
     def class_name(self) -> str:
@@ -39,7 +179,7 @@ class PathOfBuildingAPI:
 
         :return: Character class.
         :rtype: :class:`str`"""
-        return self.xml.find("Build").get("className")
+        return _intern(self.xml.find("Build").get("className"))
 
     @memoized_property
     def ascendancy_name(self) -> Optional[str]:
@@ -47,7 +187,7 @@ class PathOfBuildingAPI:
 
         :return: Character ascendancy class, if ascended.
         :rtype: :data:`~typing.Optional`\\[:class:`str`]"""
-        return self.xml.find("Build").get("ascendClassName")
+        return _intern(self.xml.find("Build").get("ascendClassName"))
 
     @memoized_property
     def level(self) -> int:
@@ -75,7 +215,7 @@ class PathOfBuildingAPI:
         return self.skill_groups[index]
 
     @memoized_property
-    def stats(self) -> stats.Stats:
+    def stats(self) -> "stats.Stats":
         """Namespace for character stats.
 
         :return: Character stats.
@@ -84,7 +224,9 @@ class PathOfBuildingAPI:
             constants.STATS_MAP.get(i.get("stat")): float(i.get("value"))
             for i in self.xml.find("Build").findall("PlayerStat")
         }
-        return stats.Stats(**kwargs)
+        from pobapi.stats import Stats
+
+        return Stats(**kwargs)
 
     @memoized_property
     @listify
@@ -180,7 +322,7 @@ class PathOfBuildingAPI:
         :return: Keystones.
         :rtype: :class:`~pobapi.models.Keystones`"""
         kwargs = {
-            keystone: id_ in self.active_skill_tree.nodes
+            keystone: id_ in self.active_skill_tree.node_set
             for keystone, id_ in constants.KEYSTONE_IDS.items()
         }
         return models.Keystones(**kwargs)
@@ -215,24 +357,29 @@ class PathOfBuildingAPI:
             # The 3-stat variant obtained from Uber Elder is not yet implemented in PoB.
             mod_ranges = [float(i.get("range")) for i in text.findall("ModRange")]
             item = text.text.strip("\n\r\t").splitlines()
-            rarity = _get_stat(item, "Rarity: ").capitalize()
+            stats = _get_stats(item)
+            rarity = _intern(stats.get("Rarity: ").capitalize())
             name = item[1]
-            base = name if rarity in ("Normal", "Magic") else item[2]
-            uid = _get_stat(item, "Unique ID: ")
-            shaper = bool(_get_stat(item, "Shaper Item"))
-            elder = bool(_get_stat(item, "Elder Item"))
-            crafted = bool(_get_stat(item, "{crafted}"))
-            _quality = _get_stat(item, "Quality: ")
+            if rarity == "Magic":
+                # Names of magic items include their affixes, so are rarely repeated.
+                base = name
+            else:
+                base = _intern(name if rarity == "Normal" else item[2])
+            uid = stats.get("Unique ID: ")
+            shaper = "Shaper Item" in stats
+            elder = "Elder Item" in stats
+            crafted = "{crafted}" in stats
+            _quality = stats.get("Quality: ")
             quality = int(_quality) if _quality else None
-            _sockets = _get_stat(item, "Sockets: ")
+            _sockets = stats.get("Sockets: ")
             sockets = (
                 tuple(tuple(group.split("-")) for group in _sockets.split())
                 if _sockets
                 else None
             )
-            level_req = int(_get_stat(item, "LevelReq: ") or 1)
-            item_level = int(_get_stat(item, "Item Level: ") or 1)
-            implicit = int(_get_stat(item, "Implicits: "))
+            level_req = int(stats.get("LevelReq: ") or 1)
+            item_level = int(stats.get("Item Level: ") or 1)
+            implicit = int(stats.get("Implicits: "))
             item_text = _get_text(item, variant, alt_variant, mod_ranges)
             # fmt: off
             yield models.Item(rarity, name, base, uid, shaper, elder, crafted, quality,
@@ -267,7 +414,7 @@ class PathOfBuildingAPI:
             yield models.Set(**kwargs)
 
     @memoized_property
-    def config(self) -> config.Config:
+    def config(self) -> "config.Config":
         """Namespace for Path Of Building config tab's options and values.
 
         :return: Path Of Building config.
@@ -286,7 +433,9 @@ class PathOfBuildingAPI:
             for i in self.xml.find("Config").findall("Input")
         }
         kwargs["character_level"] = self.level
-        return config.Config(**kwargs)
+        from pobapi.config import Config
+
+        return Config(**kwargs)
 
     @classmethod
     @listify
@@ -299,7 +448,7 @@ class PathOfBuildingAPI:
             :class:`~pobapi.models.GrantedAbility`]]"""
         for ability in skill:
             gem_id = ability.get("gemId")
-            name = ability.get("nameSpec")
+            name = _intern(ability.get("nameSpec"))
             enabled = ability.get("enabled") == "true"
             level = int(ability.get("level"))
             if gem_id:
@@ -311,7 +460,13 @@ class PathOfBuildingAPI:
                 yield models.GrantedAbility(name, enabled, level)
 
 
-def from_url(url: str, timeout: float = 6.0) -> PathOfBuildingAPI:
+def from_url(
+    url: str,
+    timeout: float = 6.0,
+    sections: Optional[Collection[str]] = None,
+    cache: Optional["Cache"] = None,
+    lazy: bool = False,
+) -> PathOfBuildingAPI:
     """Instantiate build class from a pastebin.com link generated with Path Of Building.
 
     :raises: :class:`~requests.URLRequired`, :class:`~requests.Timeout`,
@@ -319,14 +474,105 @@ def from_url(url: str, timeout: float = 6.0) -> PathOfBuildingAPI:
         :class:`~requests.TooManyRedirects`, :class:`~requests.RequestException`
 
     :param url: pastebin.com link generated with Path Of Building.
-    :param timeout: Timeout for the request."""
-    return PathOfBuildingAPI(_fetch_xml_from_url(url, timeout))
-
-
-def from_import_code(import_code: str) -> PathOfBuildingAPI:
+    :param timeout: Timeout for the request.
+    :param sections: Top-level XML sections to keep, see
+        :class:`~pobapi.api.PathOfBuildingAPI`.
+    :param cache: Cache to look up the build in before fetching it, see
+        :mod:`pobapi.cache`.
+    :param lazy: Whether to parse sections on first access, see
+        :class:`~pobapi.api.PathOfBuildingAPI`."""
+    if cache is not None:
+        return _from_cache(
+            cache, url, sections, lambda: _fetch_xml_from_url(url, timeout)
+        )
+    return PathOfBuildingAPI(_fetch_xml_from_url(url, timeout), sections, lazy)
+
+
+def from_import_code(
+    import_code: str,
+    sections: Optional[Collection[str]] = None,
+    cache: Optional["Cache"] = None,
+    lazy: bool = False,
+    max_size: Optional[int] = None,
+) -> PathOfBuildingAPI:
     """Instantiate build class from an import code generated with Path Of Building.
 
     :raises: :class:`TypeError`, :class:`ValueError`
 
-    :param import_code: import code generated with Path Of Building."""
-    return PathOfBuildingAPI(_fetch_xml_from_import_code(import_code))
+    :param import_code: import code generated with Path Of Building.
+    :param sections: Top-level XML sections to keep, see
+        :class:`~pobapi.api.PathOfBuildingAPI`.
+    :param cache: Cache to look up the build in before decoding it, see
+        :mod:`pobapi.cache`.
+    :param lazy: Whether to parse sections on first access, see
+        :class:`~pobapi.api.PathOfBuildingAPI`.
+    :param max_size: Maximum size of the decompressed XML document in bytes,
+        guarding against decompression bombs. Unless parsing lazily,
+        decompression and parsing are interleaved chunk by chunk."""
+    if cache is not None:
+        return _from_cache(
+            cache,
+            import_code,
+            sections,
+            lambda: _fetch_xml_from_import_code(import_code, max_size),
+        )
+    if max_size is not None and not lazy:
+        root = _parse_import_code(import_code, max_size, sections)
+        if root is None:
+            raise ValueError("Import code could not be decoded.")
+        return PathOfBuildingAPI._from_element(root)
+    return PathOfBuildingAPI(
+        _fetch_xml_from_import_code(import_code, max_size), sections, lazy
+    )
+
+
+def _from_cache(
+    cache: "Cache",
+    source: str,
+    sections: Optional[Collection[str]],
+    fetch: Callable[[], bytes],
+) -> PathOfBuildingAPI:
+    """Instantiate build class from a cache, fetching and caching it on a miss.
+
+    On a miss, all properties available with the given sections are computed
+    and cached. On a hit, they are restored without any XML being parsed.
+    Properties that cannot be computed from the document are not cached and
+    raise when accessed, as they would without a cache.
+
+    :return: Build class."""
+    if sections is not None:
+        source += "\0" + ",".join(sorted(sections))
+    values = cache.load(source)
+    if values is None:
+        build = PathOfBuildingAPI(fetch(), sections)
+        values = _compute(
+            build,
+            (
+                name
+                for name, required in _SECTIONS.items()
+                if sections is None or set(required).issubset(sections)
+            ),
+        )
+        cache.store(source, values)
+        return build
+    build = PathOfBuildingAPI.__new__(PathOfBuildingAPI)
+    build.xml = None
+    # Memoized properties are looked up in the instance dictionary first.
+    build.__dict__.update(values)
+    return build
+
+
+def _compute(build: PathOfBuildingAPI, names: Iterable[str]) -> Dict[str, Any]:
+    """Compute properties of a build, skipping those that fail.
+
+    :return: Dictionary of {<property name> : <property value>} of the properties
+        computed successfully."""
+    values = {}
+    for name in names:
+        try:
+            values[name] = getattr(build, name)
+        except Exception:
+            # Valid documents can lack data single properties rely on,
+            # e.g. empty notes or no skill groups.
+            continue
+    return values
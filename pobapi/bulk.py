@@ -0,0 +1,220 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from dataslots import with_slots
+
+from pobapi.api import _SECTIONS, PathOfBuildingAPI
+from pobapi.util import _fetch_xml_from_import_code
+
+"""Bulk decoding and encoding of Path Of Building import codes."""
+
+__all__ = ["ParseResult", "parse_many", "iter_parse", "encode_many", "iter_encode"]
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+#: Properties extracted by :func:`parse_many` by default.
+DEFAULT_FIELDS = (
+    "class_name",
+    "ascendancy_name",
+    "level",
+    "bandit",
+    "stats",
+    "active_skill_tree",
+)
+
+
+@with_slots
+@dataclass
+class ParseResult:
+    """Class that holds the outcome of parsing a single import code.
+
+    :param values: Dictionary of {<property name> : <property value>},
+        if parsing succeeded.
+    :param error: Error message, if parsing failed."""
+
+    values: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+def parse_many(
+    import_codes: Iterable[str],
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> List[ParseResult]:
+    """Parse many import codes generated with Path Of Building in parallel.
+
+    Only the XML sections required by the requested fields are kept while parsing.
+    Failures are reported per import code instead of aborting the whole batch.
+
+    :param import_codes: Import codes generated with Path Of Building.
+    :param fields: Names of :class:`~pobapi.api.PathOfBuildingAPI` properties
+        to extract.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+        With 1 worker, import codes are parsed in the calling process.
+    :param chunksize: Number of import codes sent to a worker at once.
+    :return: Parse results, in the same order as the import codes.
+    :rtype: :class:`~typing.List`\\[:class:`~pobapi.bulk.ParseResult`]"""
+    fields = tuple(fields)
+    sections = frozenset(section for field in fields for section in _SECTIONS[field])
+    worker = partial(_parse, fields=fields, sections=sections)
+    if workers == 1:
+        return list(map(worker, import_codes))
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(worker, import_codes, chunksize=chunksize))
+
+
+def iter_parse(
+    import_codes: Iterable[str],
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    window: int = 4096,
+) -> Iterator[ParseResult]:
+    """Parse a stream of import codes generated with Path Of Building in parallel.
+
+    Like :func:`parse_many`, but results are yielded as soon as they are ready
+    and import codes are only read from the stream while fewer than ``window``
+    of them are in flight, so memory use is bounded for streams of any length.
+
+    :param import_codes: Import codes generated with Path Of Building.
+    :param fields: Names of :class:`~pobapi.api.PathOfBuildingAPI` properties
+        to extract.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+        With 1 worker, import codes are parsed in the calling process.
+    :param chunksize: Number of import codes sent to a worker at once.
+    :param window: Maximum number of import codes read but not yet yielded.
+    :return: Generator for parse results, in the same order as the import codes."""
+    fields = tuple(fields)
+    sections = frozenset(section for field in fields for section in _SECTIONS[field])
+    if workers == 1:
+        yield from map(partial(_parse, fields=fields, sections=sections), import_codes)
+        return
+    worker = partial(_parse_chunk, fields=fields, sections=sections)
+    with ProcessPoolExecutor(workers) as executor:
+        yield from _iter_chunks(executor, worker, import_codes, chunksize, window)
+
+
+def encode_many(
+    builds: Iterable[PathOfBuildingAPI],
+    level: int = -1,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> List[str]:
+    """Encode many builds as import codes in parallel.
+
+    :param builds: Builds to encode, see :meth:`~pobapi.api.PathOfBuildingAPI.to_xml`.
+    :param level: zlib compression level, from 0 (fastest) to 9 (smallest),
+        -1 for zlib's default.
+    :param workers: Number of worker threads, see :func:`iter_encode`.
+    :param chunksize: Number of builds encoded by a worker at once.
+    :return: Import codes, in the same order as the builds."""
+    return list(iter_encode(builds, level, workers, chunksize))
+
+
+def iter_encode(
+    builds: Iterable[PathOfBuildingAPI],
+    level: int = -1,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    window: int = 4096,
+) -> Iterator[str]:
+    """Encode a stream of builds as import codes in parallel.
+
+    Builds are encoded by threads, as zlib compression releases the GIL
+    and parsed XML documents cannot be sent to worker processes without
+    serializing them first. Builds are only read from the stream while fewer
+    than ``window`` of them are in flight.
+
+    :raises: :class:`ValueError` if a build has no XML document.
+
+    :param builds: Builds to encode, see :meth:`~pobapi.api.PathOfBuildingAPI.to_xml`.
+    :param level: zlib compression level, from 0 (fastest) to 9 (smallest),
+        -1 for zlib's default.
+    :param workers: Number of worker threads, defaults to the number of CPUs.
+        With 1 worker, builds are encoded in the calling thread.
+    :param chunksize: Number of builds encoded by a worker at once.
+    :param window: Maximum number of builds read but not yet yielded.
+    :return: Generator for import codes, in the same order as the builds."""
+    if workers == 1:
+        for build in builds:
+            yield build.to_import_code(level)
+        return
+    worker = partial(_encode_chunk, level=level)
+    with ThreadPoolExecutor(workers or os.cpu_count()) as executor:
+        yield from _iter_chunks(executor, worker, builds, chunksize, window)
+
+
+def _iter_chunks(
+    executor: Executor,
+    worker: Callable[[List[_T]], List[_R]],
+    items: Iterable[_T],
+    chunksize: int,
+    window: int,
+) -> Iterator[_R]:
+    """Process a stream in chunks, keeping at most ``window`` items in flight.
+
+    :return: Generator for results, in the same order as the items."""
+    items = iter(items)
+    pending = deque()
+    for _ in range(max(window // chunksize, 1)):
+        chunk = list(islice(items, chunksize))
+        if not chunk:
+            break
+        pending.append(executor.submit(worker, chunk))
+    while pending:
+        results = pending.popleft().result()
+        # Submit the next chunk before yielding, so workers stay busy.
+        chunk = list(islice(items, chunksize))
+        if chunk:
+            pending.append(executor.submit(worker, chunk))
+        yield from results
+
+
+def _encode_chunk(builds: List[PathOfBuildingAPI], level: int) -> List[str]:
+    """Encode a chunk of builds as import codes.
+
+    :return: Import codes."""
+    return [build.to_import_code(level) for build in builds]
+
+
+def _parse_chunk(
+    import_codes: List[str], fields: Sequence[str], sections: Collection[str]
+) -> List[ParseResult]:
+    """Parse a chunk of import codes, extracting the given properties.
+
+    :return: Parse results."""
+    return [_parse(import_code, fields, sections) for import_code in import_codes]
+
+
+def _parse(
+    import_code: str, fields: Sequence[str], sections: Collection[str]
+) -> ParseResult:
+    """Parse a single import code, extracting the given properties.
+
+    :return: Parse result."""
+    xml = _fetch_xml_from_import_code(import_code)
+    if xml is None:
+        return ParseResult(None, "Import code could not be decoded.")
+    try:
+        build = PathOfBuildingAPI(xml, sections)
+        return ParseResult({field: getattr(build, field) for field in fields})
+    except Exception as e:
+        return ParseResult(None, f"{type(e).__name__}: {e}")
@@ -0,0 +1,179 @@
+import hashlib
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from pobapi.snapshot import _dumps, _loads
+
+"""Caches for builds decoded from import codes and pastebin.com links."""
+
+__all__ = ["Cache", "MemoryCache", "SQLiteCache"]
+
+
+class Cache(ABC):
+    """Abstract class for size-bounded least-recently-used caches.
+
+    Builds are stored as compressed, already extracted models.
+    Subclasses only have to implement storage of binary values.
+
+    :param max_size: Maximum total size of all cached values in bytes."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+    @abstractmethod
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Get a cached value and mark it as recently used.
+
+        :return: Cached value, if present."""
+
+    @abstractmethod
+    def set(self, key: bytes, value: bytes) -> None:
+        """Cache a value, evicting the least recently used values if necessary."""
+
+    def load(self, source: str) -> Optional[Dict[str, Any]]:
+        """Get the cached models of a build.
+
+        :param source: Import code or pastebin.com link of the build.
+        :return: Dictionary of {<property name> : <property value>}, if cached."""
+        value = self.get(_key(source))
+        if value is not None:
+            return _loads(zlib.decompress(value))
+
+    def store(self, source: str, values: Dict[str, Any]) -> None:
+        """Cache the models of a build.
+
+        :param source: Import code or pastebin.com link of the build.
+        :param values: Dictionary of {<property name> : <property value>}."""
+        value = zlib.compress(_dumps(values))
+        self.set(_key(source), value)
+
+
+class MemoryCache(Cache):
+    """In-process cache backed by a dictionary.
+
+    :param max_size: Maximum total size of all cached values in bytes."""
+
+    def __init__(self, max_size: int = 64 * 1024**2):
+        super().__init__(max_size)
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: bytes, value: bytes) -> None:
+        if len(value) > self.max_size:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_size:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class SQLiteCache(Cache):
+    """Persistent cache backed by a local SQLite database.
+
+    :param path: Path to the database file, created if it does not exist.
+    :param max_size: Maximum total size of all cached values in bytes."""
+
+    def __init__(self, path: str, max_size: int = 1024**3):
+        super().__init__(max_size)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS builds "
+                "(key BLOB PRIMARY KEY, value BLOB NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS builds_used ON builds (used)"
+            )
+            # Running total size of all values, so that inserting does not have to
+            # scan the whole table.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (size INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT INTO meta SELECT IFNULL(SUM(LENGTH(value)), 0) FROM builds "
+                "WHERE NOT EXISTS (SELECT 1 FROM meta)"
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM builds").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Total size of all cached values in bytes."""
+        with self._lock:
+            return self._connection.execute("SELECT size FROM meta").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value FROM builds WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE builds SET used = (SELECT MAX(used) FROM builds) + 1 "
+                    "WHERE key = ?",
+                    (key,),
+                )
+                return row[0]
+
+    def set(self, key: bytes, value: bytes) -> None:
+        if len(value) > self.max_size:
+            return
+        with self._lock, self._connection:
+            # Updating the size first starts the transaction, so the replaced value
+            # cannot change before it is replaced.
+            self._connection.execute(
+                "UPDATE meta SET size = size + ? - IFNULL("
+                "(SELECT LENGTH(value) FROM builds WHERE key = ?), 0)",
+                (len(value), key),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO builds (key, value, used) "
+                "VALUES (?, ?, (SELECT IFNULL(MAX(used), 0) FROM builds) + 1)",
+                (key, value),
+            )
+            size = initial = self._connection.execute(
+                "SELECT size FROM meta"
+            ).fetchone()[0]
+            while size > self.max_size:
+                key, length = self._connection.execute(
+                    "SELECT key, LENGTH(value) FROM builds ORDER BY used LIMIT 1"
+                ).fetchone()
+                self._connection.execute("DELETE FROM builds WHERE key = ?", (key,))
+                size -= length
+            if size != initial:
+                self._connection.execute("UPDATE meta SET size = ?", (size,))
+
+
+def _key(source: str) -> bytes:
+    """Get the content-addressed cache key of an import code or pastebin.com link.
+
+    :return: Cache key."""
+    return hashlib.blake2b(source.encode(), digest_size=16).digest()
@@ -0,0 +1,247 @@
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from itertools import zip_longest
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from dataslots import with_slots
+
+from pobapi import models
+from pobapi.api import _SECTIONS, PathOfBuildingAPI
+from pobapi.util import _section_digests
+
+"""Structural comparison of two builds."""
+
+__all__ = ["BuildDiff", "TreeDiff", "diff"]
+
+#: Dictionary of {<field name> : (<old value>, <new value>)}.
+Changes = Dict[str, Tuple[Any, Any]]
+
+
+@with_slots
+@dataclass
+class TreeDiff:
+    """Class that holds the differences between two passive skill trees.
+
+    :param added_nodes: Passive skill tree nodes allocated in the new tree only.
+    :param removed_nodes: Passive skill tree nodes allocated in the old tree only.
+    :param sockets: Dictionary of {<jewel socket location> : (<old jewel set ID>,
+        <new jewel set ID>)} for changed jewel sockets."""
+
+    added_nodes: FrozenSet[int]
+    removed_nodes: FrozenSet[int]
+    sockets: Dict[int, Tuple[Optional[int], Optional[int]]]
+
+    def __bool__(self):
+        return bool(self.added_nodes or self.removed_nodes or self.sockets)
+
+
+@with_slots
+@dataclass
+class BuildDiff:
+    """Class that holds the differences between two builds.
+
+    :param sections: Names of the compared properties that differ.
+    :param trees: Differences between skill trees at the same position.
+        Trees missing on either side compare as empty trees.
+    :param added_gems: Skill gems and granted abilities found in the new build only.
+    :param removed_gems: Skill gems and granted abilities found in the old build only.
+    :param added_items: Items found in the new build only.
+    :param removed_items: Items found in the old build only.
+    :param item_sets: Per item set position, dictionary of
+        {<slot> : (<old item>, <new item>)} for slots holding different items.
+    :param stats: Changed stats.
+    :param config: Changed config options.
+
+    .. note:: Gems and items are compared as multisets of their values,
+        so reordering them is not a change."""
+
+    sections: FrozenSet[str] = frozenset()
+    trees: List[TreeDiff] = field(default_factory=list)
+    added_gems: List[models.Ability] = field(default_factory=list)
+    removed_gems: List[models.Ability] = field(default_factory=list)
+    added_items: List[models.Item] = field(default_factory=list)
+    removed_items: List[models.Item] = field(default_factory=list)
+    item_sets: List[
+        Dict[str, Tuple[Optional[models.Item], Optional[models.Item]]]
+    ] = field(default_factory=list)
+    stats: Changes = field(default_factory=dict)
+    config: Changes = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.sections)
+
+
+def diff(a: PathOfBuildingAPI, b: PathOfBuildingAPI) -> BuildDiff:
+    """Compare two builds structurally.
+
+    Top-level XML sections are hashed first and properties only depending on
+    unchanged sections are skipped without being computed.
+
+    :param a: Old build.
+    :param b: New build.
+    :return: Differences from a to b, falsy if there are none."""
+    digests_a = _section_digests(a.xml)
+    digests_b = _section_digests(b.xml)
+
+    def _changed(name: str) -> bool:
+        if not digests_a or not digests_b:
+            return True
+        return any(
+            digests_a.get(section) != digests_b.get(section)
+            for section in _SECTIONS[name]
+        )
+
+    result = BuildDiff()
+    changed = set()
+    if _changed("trees"):
+        result.trees = [
+            _diff_trees(old, new) for old, new in zip_longest(a.trees, b.trees)
+        ]
+        if any(result.trees):
+            changed.add("trees")
+    if _changed("skill_groups"):
+        result.added_gems, result.removed_gems = _diff_multisets(
+            _abilities(a.skill_groups), _abilities(b.skill_groups)
+        )
+        if (
+            result.added_gems
+            or result.removed_gems
+            or any(_diff_multisets(a.skill_groups, b.skill_groups))
+        ):
+            changed.add("skill_groups")
+    if _changed("items"):
+        result.added_items, result.removed_items = _diff_multisets(a.items, b.items)
+        if result.added_items or result.removed_items:
+            changed.add("items")
+    if _changed("item_sets"):
+        old_items, new_items = _items_by_slot_id(a), _items_by_slot_id(b)
+        result.item_sets = [
+            _diff_item_set(old, new, old_items, new_items)
+            for old, new in zip_longest(a.item_sets, b.item_sets)
+        ]
+        if any(result.item_sets):
+            changed.add("item_sets")
+    if _changed("stats"):
+        result.stats = _diff_fields(a.stats, b.stats)
+        if result.stats:
+            changed.add("stats")
+    if _changed("config"):
+        result.config = _diff_fields(a.config, b.config)
+        if result.config:
+            changed.add("config")
+    result.sections = frozenset(changed)
+    return result
+
+
+def _key(value: Any) -> Hashable:
+    """Get a hashable key of a model or builtin value, equal for equal values.
+
+    :return: Key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key(v)) for k, v in value.items()))
+    if hasattr(value, "__dataclass_fields__"):
+        return (type(value),) + tuple(
+            _key(getattr(value, f.name)) for f in fields(value) if f.compare
+        )
+    return value
+
+
+def _diff_multisets(old: List, new: List) -> Tuple[List, List]:
+    """Compare two lists of values regardless of their order.
+
+    :return: Tuple of (<values only in new>, <values only in old>)."""
+    old_keys = [_key(value) for value in old]
+    new_keys = [_key(value) for value in new]
+    old_counts = Counter(old_keys)
+    new_counts = Counter(new_keys)
+    added = new_counts - old_counts
+    removed = old_counts - new_counts
+    return _take(new, new_keys, added), _take(old, old_keys, removed)
+
+
+def _take(values: List, keys: List[Hashable], counts: Counter) -> List:
+    """Pick values by key in order, as often as given by counts.
+
+    :return: Values."""
+    result = []
+    if counts:
+        for value, key in zip(values, keys):
+            if counts[key] > 0:
+                counts[key] -= 1
+                result.append(value)
+    return result
+
+
+def _abilities(skill_groups: List[models.SkillGroup]) -> List[models.Ability]:
+    """Flatten the abilities of all skill groups.
+
+    :return: Skill gems and granted abilities."""
+    return [ability for group in skill_groups for ability in group.abilities]
+
+
+def _diff_trees(old: Optional[models.Tree], new: Optional[models.Tree]) -> TreeDiff:
+    """Compare two passive skill trees, each possibly missing.
+
+    :return: Tree differences."""
+    old_nodes = old.node_set if old is not None else frozenset()
+    new_nodes = new.node_set if new is not None else frozenset()
+    old_sockets = old.sockets if old is not None else {}
+    new_sockets = new.sockets if new is not None else {}
+    sockets = {
+        location: (old_sockets.get(location), new_sockets.get(location))
+        for location in old_sockets.keys() | new_sockets.keys()
+        if old_sockets.get(location) != new_sockets.get(location)
+    }
+    return TreeDiff(new_nodes - old_nodes, old_nodes - new_nodes, sockets)
+
+
+def _diff_item_set(
+    old: Optional[models.Set],
+    new: Optional[models.Set],
+    old_items: Dict[int, models.Item],
+    new_items: Dict[int, models.Item],
+) -> Dict[str, Tuple[Optional[models.Item], Optional[models.Item]]]:
+    """Compare the items equipped in two item sets, each possibly missing.
+    Slots are compared by item value, as item IDs differ between builds.
+
+    :return: Dictionary of {<slot> : (<old item>, <new item>)}."""
+    result = {}
+    for slot in fields(models.Set):
+        old_id = getattr(old, slot.name) if old is not None else None
+        new_id = getattr(new, slot.name) if new is not None else None
+        if old_id is None and new_id is None:
+            continue
+        old_item = old_items.get(old_id) if old_id is not None else None
+        new_item = new_items.get(new_id) if new_id is not None else None
+        if old_item != new_item:
+            result[slot.name] = (old_item, new_item)
+    return result
+
+
+def _items_by_slot_id(build) -> Dict[int, models.Item]:
+    """Map the slot IDs of a build's item sets to its items.
+    Slot IDs are derived from item IDs, which need not follow the order of items.
+    Builds without an XML document, e.g. restored from a cache,
+    fall back to the order of items.
+
+    :return: Dictionary of {<slot ID> : <item>}."""
+    section = build.xml.find("Items") if build.xml is not None else None
+    if section is None:
+        return dict(enumerate(build.items))
+    ids = (int(item.get("id")) - 1 for item in section.findall("Item"))
+    return dict(zip(ids, build.items))
+
+
+def _diff_fields(old: Any, new: Any) -> Changes:
+    """Compare the fields of two dataclass instances.
+
+    :return: Dictionary of {<field name> : (<old value>, <new value>)}."""
+    result = {}
+    for f in fields(old):
+        old_value = getattr(old, f.name)
+        new_value = getattr(new, f.name)
+        if old_value != new_value:
+            result[f.name] = (old_value, new_value)
+    return result
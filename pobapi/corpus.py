@@ -0,0 +1,203 @@
+import mmap
+import os
+import struct
+from typing import Collection, Iterable, Iterator, List, Optional, Union
+
+from lxml.etree import fromstring
+
+from pobapi.api import PathOfBuildingAPI
+
+"""Append-only files of XML build documents with random access.
+
+A corpus consists of a data file holding the concatenated documents and
+an index file (data file path + ``.idx``) holding the (offset, length) of every
+document as pairs of little-endian unsigned 64-bit integers.
+
+>>> with CorpusWriter("builds.corpus") as writer:
+...     writer.extend(documents)
+>>> with Corpus("builds.corpus") as corpus:
+...     build = corpus.build(123, lazy=True)"""
+
+__all__ = ["Corpus", "CorpusWriter"]
+
+_ENTRY = struct.Struct("<QQ")
+
+
+def _parses_buffers() -> bool:
+    """Check whether lxml parses documents from buffers without copying them.
+
+    :return: Truth value."""
+    try:
+        fromstring(memoryview(b"<a/>"))
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+_PARSES_BUFFERS = _parses_buffers()
+
+
+class CorpusWriter:
+    """Class that appends XML build documents to a corpus.
+
+    Documents become visible to readers on :meth:`flush`, which writes their
+    index entries only after the documents themselves, so readers never see
+    incomplete documents. Only one writer may append to a corpus at a time.
+
+    :param path: Path of the data file, created if it does not exist."""
+
+    def __init__(self, path: str):
+        index_path = path + ".idx"
+        if os.path.exists(index_path):
+            # Drop an incomplete index entry left behind by an interrupted writer.
+            size = os.path.getsize(index_path)
+            os.truncate(index_path, size - size % _ENTRY.size)
+        self._data = open(path, "ab")
+        self._index = open(index_path, "ab")
+        self._offset = self._data.seek(0, os.SEEK_END)
+        self._count = self._index.seek(0, os.SEEK_END) // _ENTRY.size
+        self._pending: List[bytes] = []
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, xml: bytes) -> int:
+        """Append a Path Of Building XML document.
+
+        :return: Record number of the document."""
+        self._data.write(xml)
+        self._pending.append(_ENTRY.pack(self._offset, len(xml)))
+        self._offset += len(xml)
+        self._count += 1
+        return self._count - 1
+
+    def extend(self, documents: Iterable[bytes]) -> None:
+        """Append many Path Of Building XML documents."""
+        for xml in documents:
+            self.append(xml)
+
+    def flush(self) -> None:
+        """Make appended documents visible to readers."""
+        self._data.flush()
+        os.fsync(self._data.fileno())
+        self._index.write(b"".join(self._pending))
+        self._index.flush()
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Flush and close the corpus files."""
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+
+class Corpus:
+    """Class that reads XML build documents from a corpus by record number.
+
+    Both files are memory-mapped read-only, so any number of processes can read
+    a corpus concurrently, also while a writer appends to it.
+    Records are :class:`memoryview` slices of the mapping and are parsed
+    without being copied, if the installed lxml version supports it.
+
+    :param path: Path of the data file.
+
+    .. note:: Use as a context manager or call :meth:`close` when done.
+        Records still referenced keep the mapping alive after closing."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = self._index = None
+        self._view = memoryview(b"")
+        self._count = 0
+        self.refresh()
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, record: int) -> memoryview:
+        if record < 0:
+            record += self._count
+        if not 0 <= record < self._count:
+            self.refresh()
+            if not 0 <= record < self._count:
+                raise IndexError("Corpus record out of range.")
+        offset, length = _ENTRY.unpack_from(self._index, record * _ENTRY.size)
+        return self._view[offset : offset + length]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for record in range(self._count):
+            yield self[record]
+
+    def build(
+        self,
+        record: int,
+        sections: Optional[Collection[str]] = None,
+        lazy: bool = False,
+    ) -> PathOfBuildingAPI:
+        """Instantiate build class from a record.
+
+        :param record: Record number.
+        :param sections: Top-level XML sections to keep, see
+            :class:`~pobapi.api.PathOfBuildingAPI`.
+        :param lazy: Whether to parse sections on first access, see
+            :class:`~pobapi.api.PathOfBuildingAPI`.
+        :return: Build class."""
+        xml: Union[memoryview, bytes] = self[record]
+        if not _PARSES_BUFFERS:
+            xml = bytes(xml)
+        return PathOfBuildingAPI(xml, sections, lazy)
+
+    def refresh(self) -> None:
+        """Map documents appended since the corpus was opened or last refreshed."""
+        index = _map(self.path + ".idx")
+        data = _map(self.path)
+        count = len(index) // _ENTRY.size if index is not None else 0
+        if count == self._count:
+            for mapping in (index, data):
+                if mapping is not None:
+                    mapping.close()
+            return
+        self._release()
+        self._index, self._data, self._count = index, data, count
+        self._view = memoryview(data)
+
+    def close(self) -> None:
+        """Unmap the corpus files."""
+        self._release()
+        self._index = self._data = None
+        self._view = memoryview(b"")
+        self._count = 0
+
+    def _release(self) -> None:
+        """Unmap the corpus files, unless records still reference them."""
+        self._view.release()
+        for mapping in (self._index, self._data):
+            if mapping is not None:
+                try:
+                    mapping.close()
+                except BufferError:
+                    # Unmapped once the last record referencing it is released.
+                    pass
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    """Memory-map a file read-only.
+
+    :return: Mapping, None if the file does not exist or is empty."""
+    try:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
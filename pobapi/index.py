@@ -0,0 +1,291 @@
+import zlib
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Set, Tuple, Union
+
+from pobapi.api import PathOfBuildingAPI
+from pobapi.snapshot import _pack, _Reader, _write_varint
+
+"""Inverted index over a corpus of builds."""
+
+__all__ = ["BuildIndex"]
+
+#: Version of the on-disk format, bump when it changes.
+VERSION: int = 2
+_MAGIC = b"PBIX"
+#: Posting lists are stored as bitmaps once more than one in this many builds
+#: contain their term, as sorted arrays of 32-bit build IDs otherwise.
+DENSITY: int = 32
+
+_NONZERO = bytes([0] + [1] * 255)
+#: Positions of the set bits of each byte value.
+_BITS = tuple(tuple(i for i in range(8) if value >> i & 1) for value in range(256))
+# Representations of posting lists on disk.
+_SPARSE, _DENSE = range(2)
+
+#: Term of an index: (<field>, <value>).
+Term = Tuple[str, Hashable]
+#: Posting list: sorted array of build IDs or bitmap, see :meth:`BuildIndex.ids`.
+Postings = Union[array, int]
+
+
+class BuildIndex:
+    """Class that maps terms of builds to the builds containing them.
+
+    Builds are identified by consecutive integer IDs in the order they are added.
+    Posting lists of terms contained in few builds are sorted arrays of build IDs,
+    so rare terms take space proportional to the number of builds containing
+    them. Posting lists of common terms are bitmaps stored as Python integers,
+    with bit n set if build n contains the term, so AND and OR queries over
+    them are single big integer operations.
+
+    >>> index = BuildIndex()
+    >>> index.extend(builds)
+    >>> index.all_of(("keystone", "vaal_pact"), ("support_level", 21))
+    [3, 17, 42]
+
+    Indexed fields and the values of their terms:
+
+    * ``gem``: Skill gem or granted ability name.
+    * ``gem_level``: Level of any skill gem or granted ability.
+    * ``support_level``: Level of any support gem.
+    * ``keystone``: :class:`~pobapi.models.Keystones` attribute, e.g. "vaal_pact".
+    * ``unique``: Unique item name.
+    * ``class``: Character class.
+    * ``ascendancy``: Character ascendancy class, None if not ascended.
+    * ``node``: Passive skill tree node ID of the active skill tree."""
+
+    def __init__(self):
+        self._postings: Dict[Term, Postings] = {}
+        self._counts: Dict[Term, int] = {}
+        # New postings are collected as IDs and merged into the posting lists
+        # on demand, as updating an immutable integer bit by bit copies it
+        # every time.
+        self._pending: Dict[Term, List[int]] = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, term: Term) -> bool:
+        return term in self._postings or term in self._pending
+
+    def add(self, build: PathOfBuildingAPI) -> int:
+        """Index a build.
+
+        :return: ID of the build."""
+        id_ = self._size
+        for term in _terms(build):
+            self._pending.setdefault(term, []).append(id_)
+        self._size += 1
+        return id_
+
+    def extend(self, builds: Iterable[PathOfBuildingAPI]) -> None:
+        """Index many builds."""
+        for build in builds:
+            self.add(build)
+
+    def terms(self) -> Set[Term]:
+        """Get all indexed terms.
+
+        :return: Terms."""
+        return self._postings.keys() | self._pending.keys()
+
+    def count(self, field: str, value: Hashable) -> int:
+        """Get the number of builds containing a term.
+
+        :return: Number of builds."""
+        if self._pending:
+            self._merge()
+        return self._counts.get((field, value), 0)
+
+    def postings(self, field: str, value: Hashable) -> int:
+        """Get the posting list of a term, for combining queries with & and |.
+
+        :return: Bitmap of build IDs, see :meth:`ids`."""
+        if self._pending:
+            self._merge()
+        return _bitmap(self._postings.get((field, value), 0))
+
+    def all_of(self, *terms: Term) -> List[int]:
+        """Find the builds containing all terms.
+
+        :return: Build IDs in ascending order."""
+        if not terms:
+            return list(range(self._size))
+        if self._pending:
+            self._merge()
+        # Starts with the rarest term, so intermediate results stay small.
+        terms = sorted(terms, key=lambda term: self._counts.get(term, 0))
+        lists = [self._postings.get(term, 0) for term in terms]
+        first = lists[0]
+        if isinstance(first, int):
+            result = -1
+            for postings in lists:
+                result &= postings
+                if not result:
+                    break
+            return list(self.ids(result))
+        # Checks the IDs of the rarest term against the other posting lists.
+        result = first.tolist()
+        for postings in lists[1:]:
+            if not result:
+                break
+            if isinstance(postings, int):
+                data = postings.to_bytes((postings.bit_length() + 7) // 8, "little")
+                size = len(data)
+                result = [
+                    id_
+                    for id_ in result
+                    if id_ >> 3 < size and data[id_ >> 3] >> (id_ & 7) & 1
+                ]
+            else:
+                contained = set(postings)
+                result = [id_ for id_ in result if id_ in contained]
+        return result
+
+    def any_of(self, *terms: Term) -> List[int]:
+        """Find the builds containing any of the terms.
+
+        :return: Build IDs in ascending order."""
+        result = 0
+        for field, value in terms:
+            result |= self.postings(field, value)
+        return list(self.ids(result))
+
+    @staticmethod
+    def ids(bitmap: int) -> Iterator[int]:
+        """Get the build IDs contained in a posting list.
+
+        :return: Generator for build IDs in ascending order."""
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        # Marks non-zero bytes with 1, so they can be found with a fast bytes.find.
+        marks = data.translate(_NONZERO)
+        index = marks.find(1)
+        while index != -1:
+            offset = index * 8
+            for bit in _BITS[data[index]]:
+                yield offset + bit
+            index = marks.find(1, index + 1)
+
+    def save(self, path: str) -> None:
+        """Write the index to a file, compressed with zlib.
+        Sorted arrays are written as differences between consecutive build IDs.
+
+        :param path: File path."""
+        if self._pending:
+            self._merge()
+        compressor = zlib.compressobj()
+        with open(path, "wb") as f:
+            header = bytearray(_MAGIC)
+            header.append(VERSION)
+            _write_varint(header, self._size)
+            _write_varint(header, len(self._postings))
+            f.write(compressor.compress(header))
+            for term, postings in self._postings.items():
+                entry = bytearray()
+                _pack(entry, term)
+                _write_varint(entry, self._counts[term])
+                if isinstance(postings, int):
+                    data = postings.to_bytes((postings.bit_length() + 7) // 8, "little")
+                    entry.append(_DENSE)
+                    _write_varint(entry, len(data))
+                    entry += data
+                else:
+                    entry.append(_SPARSE)
+                    previous = 0
+                    for id_ in postings:
+                        _write_varint(entry, id_ - previous)
+                        previous = id_
+                f.write(compressor.compress(entry))
+            f.write(compressor.flush())
+
+    @classmethod
+    def load(cls, path: str) -> "BuildIndex":
+        """Read an index written by :meth:`save`.
+
+        :raises: :class:`ValueError`
+
+        :param path: File path.
+        :return: Build index."""
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        if data[: len(_MAGIC)] != _MAGIC or data[len(_MAGIC)] != VERSION:
+            raise ValueError("Unsupported index format version.")
+        reader = _Reader(data, len(_MAGIC) + 1)
+        index = cls()
+        index._size = reader.read_varint()
+        for _ in range(reader.read_varint()):
+            term = reader.unpack()
+            count = index._counts[term] = reader.read_varint()
+            kind = data[reader.pos]
+            reader.pos += 1
+            if kind == _DENSE:
+                length = reader.read_varint()
+                start = reader.pos
+                reader.pos += length
+                index._postings[term] = int.from_bytes(
+                    data[start : reader.pos], "little"
+                )
+            else:
+                postings = array("I", bytes(4 * count))
+                id_ = 0
+                for i in range(count):
+                    id_ += reader.read_varint()
+                    postings[i] = id_
+                index._postings[term] = postings
+        return index
+
+    def _merge(self) -> None:
+        """Merge pending build IDs into the posting lists,
+        choosing each list's representation by the share of builds containing
+        its term."""
+        for term, ids in self._pending.items():
+            postings = self._postings.get(term)
+            self._counts[term] = self._counts.get(term, 0) + len(ids)
+            if postings is None:
+                self._postings[term] = array("I", ids)
+            elif isinstance(postings, int):
+                self._postings[term] = postings | _bitmap(ids)
+            else:
+                postings.extend(ids)
+        self._pending.clear()
+        for term, postings in self._postings.items():
+            dense = self._counts[term] * DENSITY > self._size
+            if dense and not isinstance(postings, int):
+                self._postings[term] = _bitmap(postings)
+            elif not dense and isinstance(postings, int):
+                # Also applies to terms that became rare as builds were added.
+                self._postings[term] = array("I", self.ids(postings))
+
+
+def _bitmap(postings: Union[Postings, List[int]]) -> int:
+    """Convert a posting list to a bitmap.
+
+    :return: Bitmap of build IDs, see :meth:`BuildIndex.ids`."""
+    if isinstance(postings, int):
+        return postings
+    if not len(postings):
+        return 0
+    bits = bytearray(postings[-1] // 8 + 1)
+    for id_ in postings:
+        bits[id_ >> 3] |= 1 << (id_ & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _terms(build: PathOfBuildingAPI) -> Set[Term]:
+    """Get the index terms of a build.
+
+    :return: Terms."""
+    terms = {("class", build.class_name), ("ascendancy", build.ascendancy_name)}
+    for group in build.skill_groups:
+        for ability in group.abilities:
+            terms.add(("gem", ability.name))
+            terms.add(("gem_level", ability.level))
+            if ability.support:
+                terms.add(("support_level", ability.level))
+    terms.update(("keystone", keystone) for keystone in build.keystones)
+    terms.update(
+        ("unique", item.name) for item in build.items if item.rarity == "Unique"
+    )
+    terms.update(("node", node) for node in build.active_skill_tree.nodes)
+    return terms
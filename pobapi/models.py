@@ -1,6 +1,6 @@
 from abc import ABC
-from dataclasses import asdict, dataclass
-from typing import Dict, List, Optional, Tuple, Union
+from dataclasses import asdict, dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 
 from dataslots import with_slots
 
@@ -80,11 +80,37 @@ class Tree:
     :param url: pathofexile.com link to passive skill tree.
     :param nodes: List of passive skill tree nodes by ID.
     :param sockets: Dictionary of
-        {<passive skill tree jewel socket location> : <jewel set ID>}."""
+        {<passive skill tree jewel socket location> : <jewel set ID>}.
+
+    .. note:: Use ``node_id in tree`` or :attr:`node_set`
+        for constant-time membership checks.
+
+    .. note:: Do not modify :attr:`nodes` in place, assign a new list instead,
+        so that :attr:`node_set` is derived again."""
 
     url: str
     nodes: List[int]
     sockets: Dict[int, int]
+    #: Set of passive skill tree nodes by ID, derived from nodes.
+    node_set: FrozenSet[int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.node_set = frozenset(self.nodes)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # Skipped during __init__, before __post_init__ derives the set.
+        if name == "nodes" and hasattr(self, "node_set"):
+            object.__setattr__(self, "node_set", frozenset(value))
+
+    def __contains__(self, node: int) -> bool:
+        return node in self.node_set
+
+    def diff(self, other: "Tree") -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Compare the allocated nodes of two skill trees.
+
+        :return: Tuple of (<nodes only in other>, <nodes only in this tree>)."""
+        return other.node_set - self.node_set, self.node_set - other.node_set
 
 
 @with_slots
@@ -103,6 +129,7 @@ class Keystones:
     :param crimson_dance: Whether the player has Crimson Dance.
     :param eldritch_battery: Whether the player has Eldritch Battery.
     :param elemental_equilibrium: Whether the player has Elemental Equilibrium.
+    :param elemental_overload: Whether the player has Elemental Overload.
     :param ghost_reaver: Whether the player has Ghost Reaver.
     :param iron_grip: Whether the player has Iron Grip.
     :param iron_reflexes: Whether the player has Iron Reflexes.
@@ -131,6 +158,7 @@ class Keystones:
     crimson_dance: bool
     eldritch_battery: bool
     elemental_equilibrium: bool
+    elemental_overload: bool
     ghost_reaver: bool
     iron_grip: bool
     iron_reflexes: bool
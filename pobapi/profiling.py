@@ -0,0 +1,125 @@
+import sys
+import threading
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+"""Opt-in instrumentation of parsing stages and properties.
+
+Stages are decoding steps (``fetch``, ``base64``, ``zlib``, ``parse``,
+``tree_decode``), encoding steps (``serialize``, ``deflate``,
+``base64_encode``) and the first computation of each property of
+:class:`~pobapi.api.PathOfBuildingAPI` (``property.<name>``).
+Timings are inclusive, e.g. ``property.active_skill`` includes
+``property.skill_groups`` if the latter was not computed yet.
+
+>>> with Profile() as profile:
+...     build = pobapi.from_import_code(code)
+...     build.items
+>>> profile.summary()["property.items"]["seconds"]
+
+.. note:: Profiles record stages of all threads while they are active."""
+
+__all__ = ["Profile"]
+
+#: Callback signature: (<stage>, <seconds>, <net allocated memory blocks>).
+Callback = Callable[[str, float, int], None]
+
+_profiles: List["Profile"] = []
+_NULL = nullcontext()
+
+
+class Profile:
+    """Class that records wall time and allocations per stage while active.
+
+    Use as a context manager. While no profile is active,
+    instrumented code only pays for a single list truth test per stage.
+
+    :param callback: Function additionally called for every recorded stage."""
+
+    def __init__(self, callback: Optional[Callback] = None):
+        self.callback = callback
+        self._stages: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Profile":
+        _profiles.append(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _profiles.remove(self)
+
+    def record(self, stage: str, seconds: float, blocks: int) -> None:
+        """Record one execution of a stage.
+
+        :param stage: Stage name.
+        :param seconds: Wall time in seconds.
+        :param blocks: Net number of memory blocks allocated."""
+        with self._lock:
+            totals = self._stages.get(stage)
+            if totals is None:
+                self._stages[stage] = [1, seconds, blocks]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] += blocks
+        if self.callback is not None:
+            self.callback(stage, seconds, blocks)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get totals per stage.
+
+        :return: Dictionary of {<stage> : {"calls": <int>, "seconds": <float>,
+            "allocated_blocks": <int>}}."""
+        with self._lock:
+            return {
+                stage: {"calls": calls, "seconds": seconds, "allocated_blocks": blocks}
+                for stage, (calls, seconds, blocks) in self._stages.items()
+            }
+
+    def to_prometheus(self, prefix: str = "pobapi") -> str:
+        """Get totals per stage in Prometheus' text exposition format.
+        Allocated blocks are a gauge, as stages can free more than they allocate.
+
+        :param prefix: Metric name prefix.
+        :return: Metrics."""
+        metrics = (
+            ("stage_calls_total", "counter", "Number of executions per stage.", 0),
+            ("stage_seconds_total", "counter", "Wall time spent per stage.", 1),
+            ("stage_allocated_blocks", "gauge", "Net memory blocks allocated.", 2),
+        )
+        with self._lock:
+            stages = {stage: list(totals) for stage, totals in self._stages.items()}
+        lines = []
+        for name, type_, description, index in metrics:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {type_}")
+            for stage, totals in stages.items():
+                lines.append(f'{prefix}_{name}{{stage="{stage}"}} {totals[index]}')
+        return "\n".join(lines) + "\n"
+
+
+class _Stage:
+    """Context manager measuring a stage for all active profiles."""
+
+    __slots__ = ("name", "start", "blocks")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.blocks = sys.getallocatedblocks()
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        seconds = perf_counter() - self.start
+        blocks = sys.getallocatedblocks() - self.blocks
+        for profile in _profiles:
+            profile.record(self.name, seconds, blocks)
+
+
+def _stage(name: str):
+    """Measure a stage if any profile is active.
+
+    :return: Context manager."""
+    return _Stage(name) if _profiles else _NULL
@@ -0,0 +1,367 @@
+import json
+import os
+import zlib
+from dataclasses import fields
+from operator import attrgetter
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from pobapi.models import Keystones
+from pobapi.tables import _require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Approximate nearest-neighbour search over builds.
+
+Builds are embedded as a normalized feature vector of character stats and
+keystones and as a MinHash signature of their skill gems and allocated
+passive skill tree nodes. The similarity of two builds is a weighted sum of
+the cosine similarity of their feature vectors and the Jaccard similarity of
+their gem and node sets, estimated from their signatures.
+
+>>> index = SimilarityIndex.from_builds(builds)
+>>> index.save("builds.similarity")
+>>> index = SimilarityIndex.load("builds.similarity")
+>>> rows, scores = index.nearest(build, k=10)
+
+.. note:: Requires `NumPy <https://numpy.org/>`_, install with ``pobapi[numpy]``."""
+
+__all__ = ["SimilarityIndex"]
+
+#: Stats embedded in feature vectors by default.
+SIMILARITY_STATS: Tuple[str, ...] = (
+    "life",
+    "energy_shield",
+    "mana",
+    "evasion",
+    "armour",
+    "block_chance",
+    "spell_block_chance",
+    "total_dps",
+    "total_dot",
+    "crit_chance",
+    "crit_multiplier",
+    "attack_speed",
+    "cast_speed",
+    "strength",
+    "dexterity",
+    "intelligence",
+)
+#: Keystones embedded in feature vectors, one component each.
+KEYSTONES: Tuple[str, ...] = tuple(field.name for field in fields(Keystones))
+#: Rows scored at once by exhaustive searches.
+BLOCK_SIZE: int = 2**16
+
+# Marks gem name hashes, so they cannot collide with node IDs.
+_GEM_TOKEN = 1 << 32
+_FILES = ("features", "signatures", "keys", "order")
+
+
+class SimilarityIndex:
+    """Class that finds the builds most similar to a given build.
+
+    Candidates are found with locality-sensitive hashing: signatures are split
+    into bands and builds agreeing on all values of any band are candidates.
+    Candidates are then ranked by their exact score. Rows are identified by
+    the position of their build in the indexed builds.
+
+    Saved indices are loaded memory-mapped, so the operating system only pages
+    in the parts of an index a query touches.
+
+    :param features: float32 array of shape (builds, dimensions), rows of unit length
+        or zero.
+    :param signatures: uint32 array of shape (builds, permutations).
+    :param columns: Stats embedded in feature vectors.
+    :param mean: Mean of each stat column after log-scaling.
+    :param std: Standard deviation of each stat column after log-scaling.
+    :param bands: Number of bands signatures are split into. More bands find
+        more, less similar candidates.
+    :param seed: Seed of the MinHash functions.
+    :param keys: uint64 array of shape (bands, builds), sorted hashes of each
+        band, computed if not given.
+    :param order: int32 array of shape (bands, builds), rows of the sorted hashes,
+        computed if not given."""
+
+    def __init__(
+        self,
+        features: "np.ndarray",
+        signatures: "np.ndarray",
+        columns: Sequence[str],
+        mean: Sequence[float],
+        std: Sequence[float],
+        bands: int = 16,
+        seed: int = 0,
+        keys: Optional["np.ndarray"] = None,
+        order: Optional["np.ndarray"] = None,
+    ):
+        _require_numpy()
+        num_perm = signatures.shape[1]
+        if num_perm % bands:
+            raise ValueError("Number of permutations must be divisible by bands.")
+        self.features = features
+        self.signatures = signatures
+        self.columns = tuple(columns)
+        self.mean = np.asarray(mean, np.float64)
+        self.std = np.asarray(std, np.float64)
+        self.bands = bands
+        self.seed = seed
+        self._a, self._b, self._band = _hash_functions(num_perm, bands, seed)
+        if keys is None:
+            keys = self._band_keys(signatures).T
+            order = np.argsort(keys, axis=1, kind="stable").astype(np.int32)
+            keys = np.take_along_axis(keys, order.astype(np.intp), axis=1)
+        self.keys = keys
+        self.order = order
+
+    def __len__(self):
+        return len(self.features)
+
+    @classmethod
+    def from_builds(
+        cls,
+        builds: Iterable,
+        columns: Sequence[str] = SIMILARITY_STATS,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 0,
+    ) -> "SimilarityIndex":
+        """Instantiate similarity index from many builds.
+
+        :param builds: :class:`~pobapi.api.PathOfBuildingAPI` instances or snapshots.
+        :param columns: Names of :class:`~pobapi.stats.Stats` fields to embed.
+        :param num_perm: Number of MinHash permutations.
+        :param bands: Number of bands signatures are split into.
+        :param seed: Seed of the MinHash functions.
+        :return: Similarity index."""
+        _require_numpy()
+        getter = attrgetter(*columns)
+        stats: List[Tuple] = []
+        keystones: List[List[bool]] = []
+        tokens: List["np.ndarray"] = []
+        for build in builds:
+            stats.append(getter(build.stats))
+            keystones.append(_keystones(build))
+            tokens.append(_tokens(build))
+        scaled = _log_scale(np.array(stats, np.float64).reshape(-1, len(columns)))
+        # Stats missing from all builds get a mean of 0, constant ones a deviation of 1.
+        missing = np.isnan(scaled)
+        count = np.maximum((~missing).sum(axis=0), 1)
+        mean = np.where(missing, 0, scaled).sum(axis=0) / count
+        std = np.sqrt((np.where(missing, 0, scaled - mean) ** 2).sum(axis=0) / count)
+        std[std == 0] = 1
+        a, b, _ = _hash_functions(num_perm, bands, seed)
+        keystones = np.array(keystones, bool).reshape(-1, len(KEYSTONES))
+        features = _features(scaled, keystones, mean, std)
+        signatures = np.array([_signature(t, a, b) for t in tokens], np.uint32)
+        return cls(
+            features,
+            signatures.reshape(-1, num_perm),
+            columns,
+            mean,
+            std,
+            bands,
+            seed,
+        )
+
+    def nearest(
+        self,
+        query: Union[int, object],
+        k: int = 10,
+        weight: float = 0.5,
+        exact: bool = False,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Find the builds most similar to a build.
+
+        :param query: Build, :class:`~pobapi.api.PathOfBuildingAPI` instance or
+            snapshot, or row of an indexed build, which is then excluded
+            from the results.
+        :param k: Maximum number of builds to find.
+        :param weight: Weight of the stats and keystones similarity, the
+            gems and nodes similarity is weighted by 1 - weight.
+        :param exact: Whether to score all builds instead of candidates only.
+            Approximate searches fall back to scoring all builds if there are
+            fewer candidates than requested builds.
+        :return: Tuple of (<rows>, <scores>), both in descending order of score."""
+        if isinstance(query, (int, np.integer)):
+            exclude = int(query)
+            vector = np.asarray(self.features[exclude])
+            signature = np.asarray(self.signatures[exclude])
+        else:
+            exclude = None
+            scaled = _log_scale(
+                np.array([attrgetter(*self.columns)(query.stats)], np.float64)
+            )
+            keystones = np.array([_keystones(query)], bool)
+            vector = _features(scaled, keystones, self.mean, self.std)[0]
+            signature = _signature(_tokens(query), self._a, self._b)
+        if not exact:
+            rows = self._candidates(signature)
+            if exclude is not None:
+                rows = rows[rows != exclude]
+            if len(rows) >= k:
+                scores = self._score(rows, vector, signature, weight)
+                return _top(rows, scores, k)
+        best_rows = np.zeros(0, np.int64)
+        best_scores = np.zeros(0, np.float64)
+        for start in range(0, len(self), BLOCK_SIZE):
+            rows = np.arange(start, min(start + BLOCK_SIZE, len(self)))
+            scores = self._score(slice(start, rows[-1] + 1), vector, signature, weight)
+            if exclude is not None and start <= exclude < start + len(rows):
+                scores[exclude - start] = -np.inf
+            best_rows, best_scores = _top(
+                np.concatenate((best_rows, rows)),
+                np.concatenate((best_scores, scores)),
+                k,
+            )
+        if exclude is not None:
+            best_rows = best_rows[best_scores != -np.inf]
+            best_scores = best_scores[best_scores != -np.inf]
+        return best_rows, best_scores
+
+    def save(self, path: str) -> None:
+        """Write the index to a directory, one NumPy file per array.
+
+        :param path: Directory path, created if it does not exist."""
+        os.makedirs(path, exist_ok=True)
+        for name in _FILES:
+            np.save(os.path.join(path, name + ".npy"), getattr(self, name))
+        meta = {
+            "columns": self.columns,
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "bands": self.bands,
+            "seed": self.seed,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "SimilarityIndex":
+        """Read an index written by :meth:`save`.
+
+        :param path: Directory path.
+        :param mmap: Whether to memory-map the arrays instead of reading them.
+        :return: Similarity index."""
+        _require_numpy()
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode)
+            for name in _FILES
+        }
+        return cls(**arrays, **meta)
+
+    def _band_keys(self, signatures: "np.ndarray") -> "np.ndarray":
+        """Hash each band of signatures.
+
+        :return: uint64 array of shape (signatures, bands)."""
+        shape = (len(signatures), self.bands, signatures.shape[1] // self.bands)
+        bands = signatures.reshape(shape).astype(np.uint64)
+        return (bands * self._band).sum(axis=2, dtype=np.uint64)
+
+    def _candidates(self, signature: "np.ndarray") -> "np.ndarray":
+        """Find the rows sharing a band with a signature.
+
+        :return: Rows in ascending order."""
+        keys = self._band_keys(signature[None])[0]
+        found = []
+        for band, key in enumerate(keys):
+            start = np.searchsorted(self.keys[band], key, "left")
+            end = np.searchsorted(self.keys[band], key, "right")
+            found.append(self.order[band, start:end])
+        return np.unique(np.concatenate(found)).astype(np.int64)
+
+    def _score(
+        self,
+        rows: Union["np.ndarray", slice],
+        vector: "np.ndarray",
+        signature: "np.ndarray",
+        weight: float,
+    ) -> "np.ndarray":
+        """Score rows against a query.
+
+        :return: float64 array of scores."""
+        cosine = self.features[rows] @ vector
+        jaccard = (self.signatures[rows] == signature).mean(axis=1)
+        return weight * cosine + (1 - weight) * jaccard
+
+
+def _hash_functions(
+    num_perm: int, bands: int, seed: int
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Draw the MinHash functions and band hash multipliers.
+
+    :return: Tuple of (<multipliers>, <increments>, <band multipliers>) of
+        multiply-shift hash functions, one per permutation."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 2**64, num_perm, np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**64, num_perm, np.uint64)
+    band = rng.integers(0, 2**64, num_perm // bands, np.uint64) | np.uint64(1)
+    return a, b, band
+
+
+def _features(
+    scaled: "np.ndarray", keystones: "np.ndarray", mean: "np.ndarray", std: "np.ndarray"
+) -> "np.ndarray":
+    """Get feature vectors from log-scaled stats and keystones.
+    Missing stats are replaced by their mean.
+
+    :return: float32 array of shape (builds, dimensions), rows of unit length
+        or zero."""
+    standardized = np.nan_to_num((scaled - mean) / std)
+    features = np.concatenate((standardized, keystones), axis=1)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (features / norms).astype(np.float32)
+
+
+def _signature(tokens: "np.ndarray", a: "np.ndarray", b: "np.ndarray") -> "np.ndarray":
+    """Get the MinHash signature of a set of tokens.
+
+    :return: uint32 array, all ones for an empty set."""
+    if not len(tokens):
+        return np.full(len(a), 2**32 - 1, np.uint32)
+    hashes = (tokens[:, None] * a + b) >> np.uint64(32)
+    return hashes.min(axis=0).astype(np.uint32)
+
+
+def _keystones(build) -> List[bool]:
+    """Get whether a build has each keystone of :data:`KEYSTONES`.
+
+    :return: Truth values."""
+    return [bool(value) for value in attrgetter(*KEYSTONES)(build.keystones)]
+
+
+def _tokens(build) -> "np.ndarray":
+    """Get the skill gems and allocated passive skill tree nodes of a build.
+
+    :return: uint64 array of node IDs and hashes of gem names."""
+    gems = [
+        zlib.crc32(gem.name.encode()) | _GEM_TOKEN
+        for gem in build.skill_gems
+        if gem.name
+    ]
+    return np.array([*build.active_skill_tree.nodes, *gems], np.uint64)
+
+
+def _log_scale(stats: "np.ndarray") -> "np.ndarray":
+    """Compress the range of stats, which spans orders of magnitude.
+
+    :return: Signed logarithms of the stats."""
+    return np.sign(stats) * np.log1p(np.abs(stats))
+
+
+def _top(
+    rows: "np.ndarray", scores: "np.ndarray", k: int
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Get the rows with the highest scores.
+
+    :return: Tuple of (<rows>, <scores>), both in descending order of score."""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
@@ -0,0 +1,360 @@
+import struct
+from copy import deepcopy
+from dataclasses import MISSING, dataclass, fields
+from typing import Any, Dict, Optional, Tuple, Union
+
+from dataslots import with_slots
+
+from pobapi import config, models, stats
+from pobapi.api import _compute
+from pobapi.util import _VOCABULARY
+
+"""Build snapshots and their compact binary format."""
+
+__all__ = ["Snapshot"]
+
+#: Version of the binary format, bump when the models or their field order change.
+VERSION: int = 4
+
+# Type tags of packed values.
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _FLOAT32, _INTEGRAL, _STR = range(8)
+_LIST, _TUPLE, _DICT, _MODEL = range(8, 12)
+
+#: Models that can be packed, identified by their position.
+_MODELS = (
+    models.Gem,
+    models.GrantedAbility,
+    models.SkillGroup,
+    models.Tree,
+    models.Keystones,
+    models.Item,
+    models.Set,
+    stats.Stats,
+    config.Config,
+)
+_MODEL_IDS = {model: id_ for id_, model in enumerate(_MODELS)}
+
+
+def _defaults(model: type) -> Tuple[Tuple[str, Any], ...]:
+    """Get the names and default values of a model's stored fields.
+    Fields without a default default to False for booleans and to None otherwise.
+    Fields excluded from __init__ are derived in __post_init__ and not stored.
+
+    :return: Tuple of (<field name>, <default value>)."""
+    result = []
+    for field in fields(model):
+        if not field.init:
+            continue
+        if field.default is not MISSING:
+            default = field.default
+        else:
+            default = False if field.type is bool else None
+        result.append((field.name, default))
+    return tuple(result)
+
+
+_MODEL_FIELDS = {model: _defaults(model) for model in _MODELS}
+#: Models with derived fields that have to be recalculated after unpacking.
+_DERIVED = frozenset(
+    model for model in _MODELS if any(not field.init for field in fields(model))
+)
+
+
+@with_slots
+@dataclass(frozen=True)
+class Snapshot:
+    """Class that holds a snapshot of all properties of a build.
+
+    Attributes mirror :class:`~pobapi.api.PathOfBuildingAPI`, except that lists
+    are stored as tuples and properties that could not be computed are None.
+    Snapshots are independent of the XML document and of the build they were
+    taken from, and can be serialized compactly with :meth:`to_bytes`.
+
+    .. note:: Attributes cannot be reassigned, but the models they hold are
+        regular, mutable dataclasses."""
+
+    class_name: str
+    ascendancy_name: Optional[str]
+    level: int
+    bandit: Optional[str]
+    active_skill_group: models.SkillGroup
+    stats: stats.Stats
+    skill_groups: Tuple[models.SkillGroup, ...]
+    active_skill: Union[models.Gem, models.GrantedAbility]
+    skill_gems: Tuple[models.Gem, ...]
+    active_skill_tree: models.Tree
+    trees: Tuple[models.Tree, ...]
+    keystones: models.Keystones
+    notes: str
+    second_weapon_set: bool
+    items: Tuple[models.Item, ...]
+    active_item_set: models.Set
+    item_sets: Tuple[models.Set, ...]
+    config: config.Config
+
+    @classmethod
+    def from_build(cls, build) -> "Snapshot":
+        """Take a snapshot of a build.
+        Property values are copied, so changes to either do not affect the other.
+
+        :param build: :class:`~pobapi.api.PathOfBuildingAPI` instance.
+        :return: Snapshot."""
+        # A single copy keeps active skill group, tree and item set shared
+        # with their lists.
+        values = deepcopy(_compute(build, (field.name for field in fields(cls))))
+        kwargs = {}
+        for field in fields(cls):
+            value = values.get(field.name)
+            kwargs[field.name] = tuple(value) if isinstance(value, list) else value
+        return cls(**kwargs)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the snapshot.
+
+        Only model fields differing from their defaults are written.
+        Active skill group, tree and item set are written as indices into their
+        lists, offset by two so that 0 stands for None and 1 for a value
+        that is not in the list and follows inline.
+
+        :return: Binary representation."""
+        out = bytearray((VERSION,))
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name in _REFERENCES:
+                target = getattr(self, _REFERENCES[field.name])
+                if value is None:
+                    _write_varint(out, 0)
+                    continue
+                index = next(
+                    (
+                        i
+                        for i, item in enumerate(target or ())
+                        if item is value or item == value
+                    ),
+                    None,
+                )
+                if index is None:
+                    # E.g. derived with dataclasses.replace.
+                    _write_varint(out, _INLINE)
+                    _pack(out, value)
+                else:
+                    _write_varint(out, index + _INLINE + 1)
+            else:
+                _pack(out, value)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Snapshot":
+        """Deserialize a snapshot.
+
+        :raises: :class:`ValueError`
+
+        :param data: Binary representation created by :meth:`to_bytes`.
+        :return: Snapshot."""
+        if not data or data[0] != VERSION:
+            raise ValueError("Unsupported snapshot format version.")
+        reader = _Reader(data, 1)
+        kwargs = {}
+        indices = {}
+        try:
+            for field in fields(cls):
+                if field.name not in _REFERENCES:
+                    kwargs[field.name] = reader.unpack()
+                    continue
+                index = reader.read_varint()
+                if index == _INLINE:
+                    kwargs[field.name] = reader.unpack()
+                elif index:
+                    indices[field.name] = index - _INLINE - 1
+                else:
+                    kwargs[field.name] = None
+            for name, index in indices.items():
+                kwargs[name] = kwargs[_REFERENCES[name]][index]
+        except (IndexError, TypeError, struct.error) as e:
+            raise ValueError("Truncated or corrupt snapshot.") from e
+        return cls(**kwargs)
+
+
+#: Snapshot fields stored as an index into another field.
+_REFERENCES: Dict[str, str] = {
+    "active_skill_group": "skill_groups",
+    "active_skill_tree": "trees",
+    "active_item_set": "item_sets",
+}
+# Reference to a value written inline instead of an index.
+_INLINE = 1
+
+
+def _dumps(value: Any) -> bytes:
+    """Serialize a value composed of builtins and models.
+
+    :return: Binary representation."""
+    out = bytearray((VERSION,))
+    _pack(out, value)
+    return bytes(out)
+
+
+def _loads(data: bytes) -> Any:
+    """Deserialize a value created by :func:`_dumps`.
+
+    :raises: :class:`ValueError`
+
+    :return: Deserialized value."""
+    if not data or data[0] != VERSION:
+        raise ValueError("Unsupported snapshot format version.")
+    try:
+        return _Reader(data, 1).unpack()
+    except (IndexError, TypeError, struct.error) as e:
+        raise ValueError("Truncated or corrupt snapshot.") from e
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """Append a non-negative integer in LEB128 encoding."""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    """Append a signed integer in zigzag LEB128 encoding."""
+    _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def _fits_float32(value: float) -> bool:
+    """Check whether a float survives conversion to single precision unchanged.
+
+    :return: Truth value."""
+    try:
+        return struct.unpack("<f", struct.pack("<f", value))[0] == value
+    except OverflowError:
+        return False
+
+
+def _pack(out: bytearray, value: Any) -> None:
+    """Append a tagged value."""
+    type_ = type(value)
+    if value is None:
+        out.append(_NONE)
+    elif type_ is bool:
+        out.append(_TRUE if value else _FALSE)
+    elif type_ is int:
+        out.append(_INT)
+        _write_int(out, value)
+    elif type_ is float:
+        if value.is_integer() and abs(value) < 2**53:
+            out.append(_INTEGRAL)
+            _write_int(out, int(value))
+        elif _fits_float32(value):
+            out.append(_FLOAT32)
+            out += struct.pack("<f", value)
+        else:
+            out.append(_FLOAT)
+            out += struct.pack("<d", value)
+    elif type_ is str:
+        encoded = value.encode()
+        out.append(_STR)
+        _write_varint(out, len(encoded))
+        out += encoded
+    elif type_ is list or type_ is tuple:
+        out.append(_LIST if type_ is list else _TUPLE)
+        _write_varint(out, len(value))
+        for item in value:
+            _pack(out, item)
+    elif type_ is dict:
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            _pack(out, key)
+            _pack(out, item)
+    elif type_ in _MODEL_IDS:
+        out.append(_MODEL)
+        _write_varint(out, _MODEL_IDS[type_])
+        changed = []
+        for index, (name, default) in enumerate(_MODEL_FIELDS[type_]):
+            item = getattr(value, name)
+            if not (item is default or type(item) is type(default) and item == default):
+                changed.append((index, item))
+        _write_varint(out, len(changed))
+        for index, item in changed:
+            _write_varint(out, index)
+            _pack(out, item)
+    else:
+        raise TypeError(f"Cannot pack {type_.__name__} values.")
+
+
+class _Reader:
+    """Reader for tagged values."""
+
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def read_varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_int(self) -> int:
+        value = self.read_varint()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def unpack(self) -> Any:
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == _NONE:
+            return None
+        elif tag == _FALSE:
+            return False
+        elif tag == _TRUE:
+            return True
+        elif tag == _INT:
+            return self.read_int()
+        elif tag == _INTEGRAL:
+            return float(self.read_int())
+        elif tag == _FLOAT32:
+            (value,) = struct.unpack_from("<f", self.data, self.pos)
+            self.pos += 4
+            return value
+        elif tag == _FLOAT:
+            (value,) = struct.unpack_from("<d", self.data, self.pos)
+            self.pos += 8
+            return value
+        elif tag == _STR:
+            length = self.read_varint()
+            value = self.data[self.pos : self.pos + length].decode()
+            self.pos += length
+            # Share known strings with parsed builds, without learning new ones.
+            return _VOCABULARY.get(value, value)
+        elif tag == _LIST:
+            return [self.unpack() for _ in range(self.read_varint())]
+        elif tag == _TUPLE:
+            return tuple(self.unpack() for _ in range(self.read_varint()))
+        elif tag == _DICT:
+            result = {}
+            for _ in range(self.read_varint()):
+                key = self.unpack()
+                result[key] = self.unpack()
+            return result
+        elif tag == _MODEL:
+            model = _MODELS[self.read_varint()]
+            model_fields = _MODEL_FIELDS[model]
+            values = dict(model_fields)
+            for _ in range(self.read_varint()):
+                name, _default = model_fields[self.read_varint()]
+                values[name] = self.unpack()
+            # Bypass __init__, so __post_init__ does not recalculate any values.
+            instance = model.__new__(model)
+            for name, value in values.items():
+                object.__setattr__(instance, name, value)
+            if model in _DERIVED:
+                instance.__post_init__()
+            return instance
+        raise ValueError(f"Invalid tag {tag} at position {self.pos - 1}.")
@@ -60,6 +60,7 @@ class Stats:
     :param mana_leech_rate_per_hit: Percent mana leeched per hit.
     :param mana_leech_gain_per_hit: Flat mana leeched per hit.
     :param total_degen: Total life degeneration.
+    :param net_regen: Net regeneration.
     :param net_life_regen: Net life regeneration.
     :param net_mana_regen: Net mana regeneration.
     :param energy_shield: Energy shield.
@@ -144,6 +145,7 @@ class Stats:
     mana_leech_rate_per_hit: float = None
     mana_leech_gain_per_hit: float = None
     total_degen: float = None
+    net_regen: float = None
     net_life_regen: float = None
     net_mana_regen: float = None
     energy_shield: float = None
@@ -0,0 +1,374 @@
+import base64
+from dataclasses import fields
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+from pobapi.constants import KEYSTONE_IDS, STATS_MAP, TREE_OFFSET
+from pobapi.models import Item
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Columnar views of data across many builds.
+
+.. note:: Requires `NumPy <https://numpy.org/>`_, install with ``pobapi[numpy]``."""
+
+__all__ = [
+    "StatsTable",
+    "ItemTable",
+    "ItemView",
+    "stats_matrix",
+    "tree_nodes",
+    "node_matrix",
+]
+
+#: Stat columns, in the order of :data:`~pobapi.constants.STATS_MAP`.
+STAT_COLUMNS: Tuple[str, ...] = tuple(dict.fromkeys(STATS_MAP.values()))
+#: Numeric and boolean item columns and their types.
+#: Missing quality and implicit counts are stored as -1.
+ITEM_COLUMNS: Dict[str, str] = {
+    "build": "int32",
+    "shaper": "bool",
+    "elder": "bool",
+    "crafted": "bool",
+    "quality": "int16",
+    "level_req": "int16",
+    "item_level": "int16",
+    "implicit": "int16",
+    "socket_count": "uint8",
+    "link_count": "uint8",
+}
+#: Item columns stored as integer codes into a tuple of distinct values.
+ITEM_CATEGORIES: Tuple[str, ...] = ("rarity", "base")
+#: Item columns stored in a concatenated UTF-8 buffer with offsets per row.
+#: Missing UIDs and sockets are stored as empty strings.
+ITEM_STRINGS: Tuple[str, ...] = ("name", "uid", "sockets", "text")
+
+
+def _require_numpy() -> None:
+    """Make sure NumPy is installed.
+
+    :raises: :class:`ImportError`"""
+    if np is None:
+        raise ImportError(
+            "NumPy is required, install with 'pip install pobapi[numpy]'."
+        )
+
+
+def stats_matrix(
+    builds: Iterable, columns: Sequence[str] = STAT_COLUMNS
+) -> "np.ndarray":
+    """Get character stats of many builds as a matrix.
+
+    :param builds: :class:`~pobapi.api.PathOfBuildingAPI` instances or snapshots.
+    :param columns: Names of :class:`~pobapi.stats.Stats` fields to include.
+    :return: float64 array of shape (builds, columns), NaN for missing stats."""
+    _require_numpy()
+    getter = attrgetter(*columns)
+    rows = [getter(build.stats) for build in builds]
+    # NumPy converts None to NaN for floating point arrays.
+    return np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+
+
+class StatsTable:
+    """Class that holds character stats of many builds in columnar form.
+
+    :param matrix: float64 array of shape (builds, columns), NaN for missing stats.
+    :param columns: Names of :class:`~pobapi.stats.Stats` fields, one per column."""
+
+    def __init__(self, matrix: "np.ndarray", columns: Sequence[str] = STAT_COLUMNS):
+        _require_numpy()
+        self.matrix = matrix
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_builds(
+        cls, builds: Iterable, columns: Sequence[str] = STAT_COLUMNS
+    ) -> "StatsTable":
+        """Instantiate stats table from many builds.
+
+        :param builds: :class:`~pobapi.api.PathOfBuildingAPI` instances or snapshots.
+        :param columns: Names of :class:`~pobapi.stats.Stats` fields to include."""
+        return cls(stats_matrix(builds, columns), columns)
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        return self.matrix[:, self._index[name]]
+
+    def percentile(self, name: str, q) -> "np.ndarray":
+        """Get percentiles of a stat, ignoring builds missing it.
+
+        :param name: Stat name.
+        :param q: Percentile or sequence of percentiles between 0 and 100.
+        :return: Percentiles."""
+        return np.nanpercentile(self[name], q)
+
+
+def tree_nodes(url: str) -> "np.ndarray":
+    """Decode a passive skill tree link without copying its node IDs.
+
+    :param url: pathofexile.com link to passive skill tree.
+    :return: Big-endian uint16 array of passive skill tree nodes by ID."""
+    _require_numpy()
+    *_, url = url.rpartition("/")
+    bin_tree = base64.urlsafe_b64decode(url)
+    count = (len(bin_tree) - TREE_OFFSET) // 2
+    return np.frombuffer(bin_tree, ">u2", count, TREE_OFFSET)
+
+
+def node_matrix(
+    trees: Iterable, nodes: Sequence[int] = tuple(KEYSTONE_IDS.values())
+) -> "np.ndarray":
+    """Check which of the given nodes are allocated in many skill trees at once.
+
+    :param trees: :class:`~pobapi.models.Tree` instances.
+    :param nodes: Passive skill tree node IDs, keystones by default.
+    :return: Boolean array of shape (trees, nodes)."""
+    _require_numpy()
+    trees = list(trees)
+    lengths = np.fromiter((len(tree.nodes) for tree in trees), np.intp, len(trees))
+    allocated = np.fromiter(
+        chain.from_iterable(tree.nodes for tree in trees), np.uint16, lengths.sum()
+    )
+    rows = np.repeat(np.arange(len(trees)), lengths)
+    # Lookup table from node ID to column, -1 for nodes that are not requested.
+    columns = np.full(2**16, -1, np.intp)
+    columns[np.asarray(nodes, np.intp)] = np.arange(len(nodes))
+    columns = columns[allocated]
+    found = columns >= 0
+    result = np.zeros((len(trees), len(nodes)), bool)
+    result[rows[found], columns[found]] = True
+    return result
+
+
+class _Strings:
+    """Class that holds strings as one concatenated UTF-8 buffer.
+
+    :param buffer: Concatenated strings.
+    :param offsets: int64 array of the start of every string and the buffer's end."""
+
+    __slots__ = ("buffer", "offsets", "_view")
+
+    def __init__(self, buffer: bytes, offsets: "np.ndarray"):
+        self.buffer = buffer
+        self.offsets = offsets
+        self._view = memoryview(buffer)
+
+    @classmethod
+    def from_strings(cls, strings: Sequence[str]) -> "_Strings":
+        encoded = [string.encode() for string in strings]
+        offsets = np.zeros(len(encoded) + 1, np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return str(self._view[self.offsets[row] : self.offsets[row + 1]], "utf-8")
+
+    def take(self, rows: "np.ndarray") -> "_Strings":
+        """Gather the strings of some rows into a new buffer.
+
+        :return: Strings of the given rows."""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Position in the old buffer of every byte of the new buffer.
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        buffer = np.frombuffer(self.buffer, np.uint8)[positions].tobytes()
+        return _Strings(buffer, offsets)
+
+
+class ItemTable:
+    """Class that holds items of many builds in columnar form.
+
+    Numeric and boolean fields (:data:`ITEM_COLUMNS`) are typed arrays,
+    rarities and base types (:data:`ITEM_CATEGORIES`) are integer codes and
+    names, UIDs, sockets and item texts (:data:`ITEM_STRINGS`) are stored in one
+    concatenated buffer each. ``socket_count`` and ``link_count`` are
+    the number of sockets and the size of the largest socket group.
+
+    Index with a column name to get the column's array, with an integer to get
+    an :class:`ItemView` of a row, or with a boolean mask, index array or slice
+    to get a filtered table:
+
+    >>> table = ItemTable.from_builds(builds)
+    >>> table[(table["link_count"] >= 5) & table.isin("rarity", ["Unique"])]
+
+    :param columns: Dictionary of {<column> : <array>}.
+    :param categories: Dictionary of {<categorical column> : <distinct values>}.
+    :param strings: Dictionary of {<string column> : <strings>}."""
+
+    def __init__(
+        self,
+        columns: Dict[str, "np.ndarray"],
+        categories: Dict[str, Tuple[str, ...]],
+        strings: Dict[str, _Strings],
+    ):
+        _require_numpy()
+        self.columns = columns
+        self.categories = categories
+        self._strings = strings
+
+    @classmethod
+    def from_builds(cls, builds: Iterable) -> "ItemTable":
+        """Instantiate item table from the items of many builds.
+
+        :param builds: :class:`~pobapi.api.PathOfBuildingAPI` instances or snapshots.
+        :return: Item table, with the position of each item's build in ``build``."""
+        return cls._from_rows(
+            (build_id, item)
+            for build_id, build in enumerate(builds)
+            for item in build.items
+        )
+
+    @classmethod
+    def from_items(cls, items: Iterable[Item]) -> "ItemTable":
+        """Instantiate item table from items.
+
+        :param items: :class:`~pobapi.models.Item` instances.
+        :return: Item table, with 0 as every item's build."""
+        return cls._from_rows((0, item) for item in items)
+
+    @classmethod
+    def _from_rows(cls, rows: Iterable[Tuple[int, Item]]) -> "ItemTable":
+        _require_numpy()
+        values: Dict[str, List] = {
+            name: [] for name in (*ITEM_COLUMNS, *ITEM_CATEGORIES, *ITEM_STRINGS)
+        }
+        for build_id, item in rows:
+            values["build"].append(build_id)
+            for name in ("shaper", "elder", "crafted", "level_req", "item_level"):
+                values[name].append(getattr(item, name))
+            for name in ("quality", "implicit"):
+                value = getattr(item, name)
+                values[name].append(-1 if value is None else value)
+            sockets = item.sockets or ()
+            values["socket_count"].append(sum(map(len, sockets)))
+            values["link_count"].append(max(map(len, sockets), default=0))
+            values["sockets"].append(" ".join("-".join(group) for group in sockets))
+            values["rarity"].append(item.rarity)
+            values["base"].append(item.base)
+            values["name"].append(item.name)
+            values["uid"].append(item.uid or "")
+            values["text"].append(item.text)
+        columns = {
+            name: np.array(values[name], dtype) for name, dtype in ITEM_COLUMNS.items()
+        }
+        categories = {}
+        for name in ITEM_CATEGORIES:
+            codes = {}
+            columns[name] = np.fromiter(
+                (codes.setdefault(value, len(codes)) for value in values[name]),
+                np.int32,
+                len(values[name]),
+            )
+            categories[name] = tuple(codes)
+        strings = {name: _Strings.from_strings(values[name]) for name in ITEM_STRINGS}
+        return cls(columns, categories, strings)
+
+    def __len__(self):
+        return len(self.columns["build"])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ItemView(self, row)
+
+    def __getitem__(self, key) -> Union["np.ndarray", "ItemView", "ItemTable"]:
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError("Item table index out of range.")
+            return ItemView(self, int(key) % len(self))
+        return self.take(np.arange(len(self))[key])
+
+    def isin(self, name: str, values: Iterable[Any]) -> "np.ndarray":
+        """Check which rows of a column hold any of the given values.
+        For categorical columns, values are compared instead of codes.
+
+        :param name: Column name.
+        :param values: Values to look for.
+        :return: Boolean array."""
+        if name in self.categories:
+            lookup = {value: code for code, value in enumerate(self.categories[name])}
+            values = [lookup[value] for value in values if value in lookup]
+        return np.isin(self.columns[name], list(values))
+
+    def take(self, rows: "np.ndarray") -> "ItemTable":
+        """Get a table of some rows.
+
+        :param rows: Row indices.
+        :return: Item table."""
+        rows = np.asarray(rows, np.intp)
+        columns = {name: column[rows] for name, column in self.columns.items()}
+        strings = {name: value.take(rows) for name, value in self._strings.items()}
+        return ItemTable(columns, self.categories, strings)
+
+    def value(self, name: str, row: int) -> Any:
+        """Get a single value as a Python object.
+
+        :param name: Field name of :class:`~pobapi.models.Item` or column name.
+        :param row: Row index.
+        :return: Value."""
+        if name in self._strings:
+            value = self._strings[name][row]
+            if name == "uid":
+                return value or None
+            if name == "sockets":
+                return (
+                    tuple(tuple(group.split("-")) for group in value.split())
+                    if value
+                    else None
+                )
+            return value
+        value = self.columns[name][row]
+        if name in self.categories:
+            return self.categories[name][value]
+        if name in ("quality", "implicit") and value < 0:
+            return None
+        return value.item()
+
+
+class ItemView:
+    """Read-only view of an :class:`ItemTable` row with the attributes of
+    :class:`~pobapi.models.Item`. Values are read from the table on access.
+
+    :param table: Item table.
+    :param row: Row index."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: ItemTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.table.value(name, self.row)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"ItemView(row={self.row}, name={self.name!r})"
+
+    def __str__(self):
+        return str(self.to_item())
+
+    def to_item(self) -> Item:
+        """Copy the row into an item.
+
+        :return: Item."""
+        return Item(
+            **{f.name: self.table.value(f.name, self.row) for f in fields(Item)}
+        )
@@ -1,16 +1,145 @@
 import base64
-import decimal
 import logging
-import struct
+import math
+import re
+import sys
+import threading
 import zlib
-from typing import Iterator, List, Union
+from array import array
+from hashlib import blake2b
+from io import BytesIO
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import requests
+from lxml.etree import (
+    XMLParser,
+    XMLPullParser,
+    _Element,
+    fromstring,
+    iterparse,
+    tostring,
+)
+from unstdlib.standard.functools_ import memoized_property as _memoized_property
 
-from pobapi.constants import TREE_OFFSET
+from pobapi.constants import SKILL_MAP, TREE_OFFSET, VAAL_SKILL_MAP
+from pobapi.profiling import _stage
 
 logger = logging.getLogger(__name__)
 
+PASTEBIN_URL = "https://pastebin.com/"
+
+# Searched with a regular expression, which unlike bytes.find supports all buffers.
+_TAG_START = re.compile(b"<")
+# Opening tag with its name, allowing for ">" in quoted attribute values.
+_OPEN_TAG = re.compile(rb"""<([A-Za-z_][\w.:-]*)(?:[^>"']|"[^"]*"|'[^']*')*?(/?)>""")
+# Markup that does not open an element.
+_SKIP = re.compile(rb"<!--.*?-->|<\?.*?\?>|<!\[CDATA\[.*?\]\]>|<![^>]*>", re.S)
+# Item header fields, each with the prefix it starts its line with.
+_ITEM_STATS = re.compile(
+    r"(Rarity: |Unique ID: |Shaper Item|Elder Item|\{crafted\}|Quality: |Sockets: "
+    r"|LevelReq: |Item Level: |Implicits: )(.*)"
+)
+# Affix value range "(A-B)" of items made in Path Of Building.
+_MOD_RANGE = re.compile(r"\(([^()-]+)-([^()-]+)\)")
+_ENCODING = re.compile(rb"""^\s*<\?xml[^>]*encoding=["']([\w.:-]+)["']""")
+
+#: Maximum number of strings the shared vocabulary learns, see :func:`_intern`.
+_VOCABULARY_SIZE = 2**16
+#: Shared instances of strings repeated across builds.
+_VOCABULARY: Dict[str, str] = {
+    value: value
+    for value in (
+        *SKILL_MAP.values(),
+        *VAAL_SKILL_MAP.keys(),
+        *VAAL_SKILL_MAP.values(),
+        "Normal",
+        "Magic",
+        "Rare",
+        "Unique",
+        "Relic",
+    )
+}
+
+
+class memoized_property(_memoized_property):
+    """A read-only @property that is only evaluated once, even if several threads
+    access it at the same time: one thread computes the value while the others
+    wait for it, without holding a lock during the computation.
+    Its first evaluation is measured as a :mod:`~pobapi.profiling` stage."""
+
+    def __init__(self, fget, doc=None, name=None):
+        super().__init__(fget, doc, name)
+        self.stage = f"property.{self.__name__}"
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        key = (id(obj), self.__name__)
+        with _pending_lock:
+            # Another thread may have stored the value since the lookup of
+            # the instance attribute that led here.
+            try:
+                return obj.__dict__[self.__name__]
+            except KeyError:
+                pass
+            pending = _pending.get(key)
+            if pending is None:
+                pending = _pending[key] = _Pending()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+        try:
+            with _stage(self.stage):
+                value = self.fget(obj)
+        except BaseException as e:
+            # Waiting threads get the error, later accesses compute again.
+            pending.set(error=e)
+            raise
+        else:
+            obj.__dict__[self.__name__] = value
+            pending.set(value=value)
+            return value
+        finally:
+            with _pending_lock:
+                del _pending[key]
+
+
+class _Pending:
+    """Value of a memoized property that is being computed by another thread."""
+
+    __slots__ = ("_done", "_value", "_error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = self._error = None
+
+    def set(self, value: Any = None, error: Optional[BaseException] = None) -> None:
+        self._value = value
+        self._error = error
+        self._done.set()
+
+    def result(self) -> Any:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+#: Memoized properties being computed, by (<instance ID>, <property name>).
+_pending: Dict[Tuple[int, str], _Pending] = {}
+_pending_lock = threading.Lock()
+
 
 def _fetch_xml_from_url(url: str, timeout: float = 6.0) -> bytes:
     """Get a Path Of Building import code shared with pastebin.com.
@@ -20,42 +149,71 @@ def _fetch_xml_from_url(url: str, timeout: float = 6.0) -> bytes:
         :class:`~requests.TooManyRedirects`, :class:`~requests.RequestException`
 
     :return: Decompressed XML build document."""
-    if url.startswith("https://pastebin.com/"):
-        raw = url.replace("https://pastebin.com/", "https://pastebin.com/raw/")
+    # Imported on first use, as it is slow to import and only needed for links.
+    import requests
+
+    if url.startswith(PASTEBIN_URL):
+        raw = _raw_url(url, PASTEBIN_URL)
         try:
-            request = requests.get(raw, timeout=timeout)
+            with _stage("fetch"):
+                request = requests.get(raw, timeout=timeout)
             request.raise_for_status()
-        except requests.URLRequired:
-            logger.exception(f"{url} is not a valid URL.")
-        except requests.Timeout:
-            logger.exception(
-                f"Connection timed out, try again or raise the timeout ({timeout}s)."
-            )
-        except requests.ConnectionError:
-            logger.exception(
-                f"There was a network problem (DNS failure, refused connection, etc)."
-            )
-        except requests.HTTPError:
-            logger.exception(f"HTTP request returned unsuccessful status code.")
-        except requests.TooManyRedirects:
-            logger.exception(f"Request exceeds the maximum number of redirects.")
         except requests.RequestException:
-            logger.exception(f"Some other unspecified fatal error; cannot continue.")
+            _log_request_error(url, timeout)
         else:
             return _fetch_xml_from_import_code(request.text)
     else:
         logger.exception(f"{url} is not a valid pastebin.com URL.")
 
 
-def _fetch_xml_from_import_code(import_code: str) -> bytes:
+def _raw_url(url: str, base_url: str) -> str:
+    """Get the link to the raw contents of a paste.
+
+    :return: Raw paste link."""
+    return url.replace(base_url, base_url + "raw/", 1)
+
+
+def _log_request_error(url: str, timeout: float) -> None:
+    """Log the :mod:`requests` exception currently being handled."""
+    import requests
+
+    try:
+        raise
+    except requests.URLRequired:
+        logger.exception(f"{url} is not a valid URL.")
+    except requests.Timeout:
+        logger.exception(
+            f"Connection timed out, try again or raise the timeout ({timeout}s)."
+        )
+    except requests.ConnectionError:
+        logger.exception(
+            f"There was a network problem (DNS failure, refused connection, etc)."
+        )
+    except requests.HTTPError:
+        logger.exception(f"HTTP request returned unsuccessful status code.")
+    except requests.TooManyRedirects:
+        logger.exception(f"Request exceeds the maximum number of redirects.")
+    except requests.RequestException:
+        logger.exception(f"Some other unspecified fatal error; cannot continue.")
+
+
+def _fetch_xml_from_import_code(
+    import_code: str, max_size: Optional[int] = None
+) -> bytes:
     """Decodes and unzips a Path Of Building import code.
 
     :raises: :class:`TypeError`, :class:`ValueError`
 
+    :param max_size: Maximum size of the decompressed document in bytes.
     :return: Decompressed XML build document."""
     try:
-        base64_decode = base64.urlsafe_b64decode(import_code)
-        decompressed_xml = zlib.decompress(base64_decode)
+        if max_size is not None:
+            decompressed_xml = b"".join(_iter_import_code(import_code, max_size))
+        else:
+            with _stage("base64"):
+                base64_decode = base64.urlsafe_b64decode(import_code)
+            with _stage("zlib"):
+                decompressed_xml = zlib.decompress(base64_decode)
     except (TypeError, ValueError):
         logger.exception("Error while decoding.")
     except zlib.error:
@@ -64,19 +222,311 @@ def _fetch_xml_from_import_code(import_code: str) -> bytes:
         return decompressed_xml
 
 
+def _encode_import_code(xml: bytes, level: int = zlib.Z_DEFAULT_COMPRESSION) -> str:
+    """Compresses and encodes an XML build document as a Path Of Building import code.
+
+    :param level: zlib compression level, from 0 (none) to 9 (smallest), -1 for
+        zlib's default.
+    :return: Import code."""
+    with _stage("deflate"):
+        compressed = zlib.compress(xml, level)
+    with _stage("base64_encode"):
+        return base64.urlsafe_b64encode(compressed).decode("ascii")
+
+
+def _parse_import_code(
+    import_code: str,
+    max_size: Optional[int] = None,
+    sections: Optional[Collection[str]] = None,
+) -> Optional[_Element]:
+    """Decode, unzip and parse a Path Of Building import code incrementally.
+    Decompressed chunks are fed to the XML parser as soon as they are available,
+    so the decompressed document never exists in memory as a whole.
+
+    :raises: :class:`TypeError`, :class:`ValueError`
+
+    :param max_size: Maximum size of the decompressed document in bytes.
+    :param sections: Top-level XML sections to keep, see :func:`_prune_sections`.
+    :return: Root element of the XML build document."""
+    chunks = _iter_import_code(import_code, max_size)
+    try:
+        with _stage("parse"):
+            if sections is None:
+                parser = XMLParser()
+                for chunk in chunks:
+                    parser.feed(chunk)
+            else:
+                parser = XMLPullParser(events=("start", "end"))
+
+                def _events():
+                    for chunk_ in chunks:
+                        parser.feed(chunk_)
+                        yield from parser.read_events()
+
+                _prune_sections(_events(), sections)
+            return parser.close()
+    except (TypeError, ValueError):
+        logger.exception("Error while decoding.")
+    except zlib.error:
+        logger.exception("Error while decompressing.")
+
+
+def _iter_import_code(
+    import_code: str, max_size: Optional[int] = None, chunk_size: int = 2**16
+) -> Iterator[bytes]:
+    """Decode and unzip a Path Of Building import code chunk by chunk.
+
+    :raises: :class:`TypeError`, :class:`ValueError`, :class:`zlib.error`
+
+    :param max_size: Maximum size of the decompressed document in bytes.
+        Decompression stops as soon as it is exceeded.
+    :param chunk_size: Maximum size of each decompressed chunk in bytes.
+    :return: Generator for chunks of the decompressed XML build document."""
+    # Whitespace would shift chunk boundaries, base64 otherwise ignores it.
+    import_code = "".join(import_code.split())
+    decompressor = zlib.decompressobj()
+    size = 0
+    # Multiples of 4 characters decode independently of each other.
+    step = chunk_size // 3 * 4
+    for start in range(0, len(import_code), step):
+        with _stage("base64"):
+            data = base64.urlsafe_b64decode(import_code[start : start + step])
+        while data:
+            with _stage("zlib"):
+                chunk = decompressor.decompress(data, chunk_size)
+            data = decompressor.unconsumed_tail
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise ValueError(f"Decompressed document exceeds {max_size} bytes.")
+            if chunk:
+                yield chunk
+    chunk = decompressor.flush()
+    if max_size is not None and size + len(chunk) > max_size:
+        raise ValueError(f"Decompressed document exceeds {max_size} bytes.")
+    if chunk:
+        yield chunk
+    if not decompressor.eof:
+        raise zlib.error("Incomplete or truncated stream.")
+
+
+def _iterparse_sections(xml: bytes, sections: Collection[str]) -> _Element:
+    """Parse a Path Of Building XML document, only keeping the given top-level sections.
+
+    :return: Root element of the pruned XML document."""
+    context = iterparse(BytesIO(xml), events=("start", "end"))
+    _prune_sections(context, sections)
+    return context.root
+
+
+def _prune_sections(
+    events: Iterable[Tuple[str, Any]], sections: Collection[str]
+) -> None:
+    """Consume parser events, clearing elements of unwanted top-level sections.
+    Elements are cleared and detached as soon as they are parsed,
+    so unwanted sections never exist in memory as a whole."""
+    depth = 0
+    keep = True
+    for event, element in events:
+        if event == "start":
+            if depth == 1:
+                keep = element.tag in sections
+            depth += 1
+            continue
+        depth -= 1
+        if depth and not keep:
+            element.clear()
+            element.getparent().remove(element)
+
+
+def _index_sections(xml: bytes) -> Dict[str, Tuple[int, int]]:
+    """Find the byte offsets of the top-level sections of an XML document
+    without parsing it.
+
+    :return: Dictionary of {<section tag> : (<start offset>, <end offset>)}."""
+    offsets = {}
+    pos = _next_tag(xml, 0)
+    root = _OPEN_TAG.match(xml, pos)
+    if root is None or root.group(2):
+        return offsets
+    pos = root.end()
+    while True:
+        pos = _next_tag(xml, pos)
+        if pos < 0 or xml[pos : pos + 2] == b"</":
+            return offsets
+        match = _OPEN_TAG.match(xml, pos)
+        if match is None:
+            raise ValueError(f"Malformed XML at position {pos}.")
+        tag = match.group(1)
+        if match.group(2):
+            end = match.end()
+        else:
+            end = _closing_tag_end(xml, tag, match.end())
+        offsets.setdefault(tag.decode(), (pos, end))
+        pos = end
+
+
+def _next_tag(xml: bytes, pos: int) -> int:
+    """Find the next opening or closing tag, skipping comments,
+    processing instructions, CDATA sections and declarations.
+
+    :return: Position of the tag, -1 if there is none."""
+    while True:
+        tag = _TAG_START.search(xml, pos)
+        if tag is None:
+            return -1
+        pos = tag.start()
+        skip = _SKIP.match(xml, pos)
+        if skip is None:
+            return pos
+        pos = skip.end()
+
+
+def _closing_tag_end(xml: bytes, tag: bytes, pos: int) -> int:
+    """Find the end of the closing tag matching an element opened before pos.
+
+    :return: Position after the closing tag."""
+    # Comments, processing instructions, CDATA sections and declarations are
+    # matched as a whole, so tags inside them are skipped.
+    tags = re.compile(
+        _SKIP.pattern
+        + b"|</"
+        + re.escape(tag)
+        + rb"\s*>|<"
+        + re.escape(tag)
+        + rb"[\s/>]",
+        re.S,
+    )
+    depth = 1
+    while True:
+        match = tags.search(xml, pos)
+        if match is None:
+            raise ValueError(f"Unclosed element {tag.decode()}.")
+        pos = match.end()
+        if match.group().startswith(b"</"):
+            depth -= 1
+            if not depth:
+                return pos
+        elif not match.group().startswith((b"<!", b"<?")):
+            # Account for nested elements with the same tag.
+            nested = _OPEN_TAG.match(xml, match.start())
+            if nested is not None:
+                pos = nested.end()
+                if not nested.group(2):
+                    depth += 1
+
+
+class _LazyDocument:
+    """XML document whose top-level sections are only parsed on first access.
+
+    Mimics the parts of :class:`lxml.etree._Element` used to look up sections."""
+
+    def __init__(self, xml: bytes, sections: Optional[Collection[str]] = None):
+        self.raw = xml
+        self.offsets = _index_sections(xml)
+        # Offsets of discarded sections, left out when serializing.
+        self.discarded: List[Tuple[int, int]] = []
+        if sections is not None:
+            self.discarded = [v for k, v in self.offsets.items() if k not in sections]
+            self.offsets = {k: v for k, v in self.offsets.items() if k in sections}
+        encoding = _ENCODING.match(xml)
+        self.encoding = encoding.group(1).decode() if encoding else None
+        self._sections = {}
+
+    def __iter__(self) -> Iterator[_Element]:
+        for tag in self.offsets:
+            yield self.find(tag)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def find(self, tag: str) -> Optional[_Element]:
+        """Get a top-level section, parsing it if it has not been accessed before.
+        Threads accessing a section at the same time may parse it more than once,
+        but all of them get the same element.
+
+        :return: Section element, if present."""
+        try:
+            return self._sections[tag]
+        except KeyError:
+            pass
+        offsets = self.offsets.get(tag)
+        if offsets is None:
+            element = None
+        else:
+            start, end = offsets
+            # lxml parsers must not be shared between threads.
+            parser = XMLParser(encoding=self.encoding)
+            with _stage("parse"):
+                element = fromstring(self.raw[start:end], parser)
+        return self._sections.setdefault(tag, element)
+
+
+def _section_digests(xml: Union[_Element, _LazyDocument, None]) -> Dict[str, bytes]:
+    """Hash each top-level section of an XML build document.
+    Sections of lazy documents are hashed without parsing them.
+
+    .. note:: Digests of lazy and eagerly parsed documents are not comparable.
+
+    :return: Dictionary of {<section tag> : <digest>}."""
+    if xml is None:
+        return {}
+    if isinstance(xml, _LazyDocument):
+        return {
+            tag: blake2b(xml.raw[start:end], digest_size=16).digest()
+            for tag, (start, end) in xml.offsets.items()
+        }
+    return {
+        section.tag: blake2b(
+            tostring(section, with_tail=False), digest_size=16
+        ).digest()
+        for section in xml
+    }
+
+
+def _serialize(xml: Union[_Element, _LazyDocument]) -> bytes:
+    """Serialize an XML build document, including changes made to its elements.
+    Sections of lazy documents that have not been parsed are copied verbatim,
+    discarded sections are left out.
+
+    :return: XML build document in byte format."""
+    with _stage("serialize"):
+        if not isinstance(xml, _LazyDocument):
+            return tostring(xml, encoding="UTF-8", xml_declaration=True)
+        encoding = xml.encoding or "UTF-8"
+        spans = [(start, end, tag) for tag, (start, end) in xml.offsets.items()]
+        spans.extend((start, end, None) for start, end in xml.discarded)
+        parts = []
+        pos = 0
+        for start, end, tag in sorted(spans):
+            if tag is None:
+                section = b""
+            else:
+                element = xml._sections.get(tag)
+                if element is None:
+                    continue
+                section = tostring(
+                    element, encoding=encoding, xml_declaration=False, with_tail=False
+                )
+            parts.append(xml.raw[pos:start])
+            parts.append(section)
+            pos = end
+        parts.append(xml.raw[pos:])
+        return b"".join(parts)
+
+
 def _skill_tree_nodes(url: str) -> List[int]:
     """Get a list of passive tree node IDs.
 
     :return: Passive tree node IDs."""
-    *_, url = url.rpartition("/")
-    bin_tree = base64.urlsafe_b64decode(url)
-    return list(
-        struct.unpack_from(
-            "!" + "H" * ((len(bin_tree) - TREE_OFFSET) // 2),
-            bin_tree,
-            offset=TREE_OFFSET,
-        )
-    )
+    with _stage("tree_decode"):
+        *_, url = url.rpartition("/")
+        bin_tree = base64.urlsafe_b64decode(url)
+        end = len(bin_tree) - (len(bin_tree) - TREE_OFFSET) % 2
+        nodes = array("H", bin_tree[TREE_OFFSET:end])
+        # Node IDs are big-endian unsigned shorts.
+        if sys.byteorder == "little":
+            nodes.byteswap()
+        return nodes.tolist()
 
 
 def _get_stat(text: List[str], stat: str) -> Union[str, type(True)]:
@@ -90,6 +540,39 @@ def _get_stat(text: List[str], stat: str) -> Union[str, type(True)]:
             return result or True
 
 
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Get the shared instance of a string repeated across builds,
+    e.g. a gem name or item base type, so equal strings are only stored once.
+    Unknown strings are learned until the vocabulary is full.
+
+    :return: Shared string."""
+    if value is None:
+        return None
+    shared = _VOCABULARY.get(value)
+    if shared is not None:
+        return shared
+    if len(_VOCABULARY) < _VOCABULARY_SIZE:
+        _VOCABULARY[value] = value
+    return value
+
+
+def _get_stats(text: List[str]) -> Dict[str, Union[str, type(True)]]:
+    """Get the values of all item header fields in a single pass.
+    Like :func:`_get_stat`, only the first line starting with a field counts
+    and fields found without a value are True.
+
+    :return: Dictionary of {<field prefix> : <item affix value or True>}."""
+    stats = {}
+    match = _ITEM_STATS.match
+    for line in text:
+        found = match(line)
+        if found is not None:
+            stat, result = found.groups()
+            if stat not in stats:
+                stats[stat] = result or True
+    return stats
+
+
 def _get_pos(text: List[str], stat: str) -> int:
     """Get the text line of an item affix.
 
@@ -132,10 +615,9 @@ def _get_text(
                     continue
             # Check for "{range:" used in range tags to filter unsupported mods.
             if "{range:" in line:
-                # "Adds (A-B) to (C-D) to something" mods need to be replaced twice.
-                while "(" in line:
-                    value = mod_ranges_[counter]
-                    line = _calculate_mod_text(line, value)
+                # "Adds (A-B) to (C-D) to something" mods share the same value.
+                if "(" in line:
+                    line = _calculate_mod_text(line, mod_ranges_[counter])
                 counter += 1
             # Omit "{variant: *}" and "{range: *}" tags.
             *_, mod = line.rpartition("}")
@@ -145,16 +627,23 @@ def _get_text(
 
 
 def _calculate_mod_text(line: str, value: float) -> str:
-    """Calculate an item affix's correct value from range and offset.
-
-    :return: Corrected item affix value."""
-    start, stop = line.partition("(")[-1].partition(")")[0].split("-")
-    width = float(stop) - float(start) + 1
-    # Python's round() function uses banker's rounding from 3.0 onwards
-    # We have to emulate Path of Exile's "towards 0" rounding.
-    # https://en.wikipedia.org/w/index.php?title=IEEE_754#Rounding_rules
-    offset = decimal.Decimal(width * value).to_integral(decimal.ROUND_HALF_DOWN)
-    result = float(start) + float(offset)
-    replace_string = f"({start}-{stop})"
-    result_string = f"{result if result % 1 else int(result)}"
-    return line.replace(replace_string, result_string)
+    """Calculate an item affix's correct values from ranges and offset.
+
+    :return: Corrected item affix values."""
+
+    def _replace(match):
+        start, stop = match.groups()
+        width = float(stop) - float(start) + 1
+        # Python's round() function uses banker's rounding from 3.0 onwards
+        # We have to emulate Path of Exile's "towards 0" rounding.
+        # https://en.wikipedia.org/w/index.php?title=IEEE_754#Rounding_rules
+        # Subtracting the floor is exact, so ties are detected exactly.
+        scaled = width * value
+        offset = math.floor(scaled)
+        fraction = scaled - offset
+        if fraction > 0.5 or fraction == 0.5 and offset < 0:
+            offset += 1
+        result = float(start) + offset
+        return f"{result if result % 1 else int(result)}"
+
+    return _MOD_RANGE.sub(_replace, line)
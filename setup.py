@@ -54,4 +54,5 @@ setup(
     keywords="pathofexile poe pathofbuilding pob",
     packages=["pobapi"],
     install_requires=["dataslots", "lxml", "requests", "unstdlib"],
+    extras_require={"numpy": ["numpy"]},
 )
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pobapi import aio, util
+
+
+@pytest.fixture(scope="module")
+def server():
+    with open("../data/test_code.txt") as f:
+        code = f.read().encode()
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            if self.path == "/raw/missing":
+                self.send_response(404)
+                self.end_headers()
+                return
+            # Fail the first request for this paste to exercise retries.
+            if self.path == "/raw/flaky" and requests_seen.count(self.path) == 1:
+                self.send_response(503)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(code)))
+            self.end_headers()
+            self.wfile.write(code)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", requests_seen
+    httpd.shutdown()
+
+
+def test_fetch_many(server):
+    base_url, requests_seen = server
+
+    async def run():
+        async with aio.PastebinClient(backoff=0.01, base_url=base_url) as client:
+            urls = [base_url + "a", base_url + "missing", base_url + "flaky"]
+            return await aio.fetch_many(urls, client)
+
+    builds = asyncio.run(run())
+    assert builds[0].class_name == "Scion"
+    assert builds[1] is None
+    assert builds[2].class_name == "Scion"
+    assert requests_seen.count("/raw/missing") == 1
+    assert requests_seen.count("/raw/flaky") == 2
+
+
+def test_from_url_async_rate(server):
+    base_url, _ = server
+
+    async def run():
+        async with aio.PastebinClient(rate=50, base_url=base_url) as client:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            urls = [base_url + str(i) for i in range(5)]
+            builds = await asyncio.gather(
+                *(aio.from_url_async(url, client=client) for url in urls)
+            )
+            return builds, loop.time() - start
+
+    builds, elapsed = asyncio.run(run())
+    assert all(build.level == 1 for build in builds)
+    assert elapsed >= 4 / 50
+
+
+def test_invalid_url(caplog):
+    url = "https://example.com/abc"
+
+    async def run():
+        async with aio.PastebinClient() as client:
+            return await client.fetch(url)
+
+    assert asyncio.run(run()) is None
+    util._fetch_xml_from_url(url)
+    async_record, sync_record = caplog.records
+    assert async_record.getMessage() == sync_record.getMessage()
+    assert async_record.levelno == sync_record.levelno
+    assert async_record.exc_info == sync_record.exc_info
@@ -1,17 +1,19 @@
 import itertools
+import re
 
 import pytest
+from lxml.etree import fromstring
 
-from pobapi import api, config, models, stats
+from pobapi import api, config, models, snapshot, stats, util
 
 BASE_URL = "https://www.pathofexile.com/passive-skill-tree/"
 
 
-@pytest.fixture(scope="module")
-def build():
+@pytest.fixture(scope="module", params=[False, True], ids=["eager", "lazy"])
+def build(request):
     with open("../data/test_code.txt") as f:
         code = f.read()
-    return api.from_import_code(code)
+    return api.from_import_code(code, lazy=request.param)
 
 
 def _assert_group(skill_group, test_list):
@@ -162,6 +164,8 @@ def test_trees(build):
 
 def test_keystones(build):
     assert 39085 in build.active_skill_tree.nodes  # 39085: Elemental Equilibrium
+    assert build.keystones.elemental_equilibrium is True
+    assert list(build.keystones) == ["elemental_equilibrium"]
 
 
 def test_items(build):
@@ -189,3 +193,166 @@ Shocked Enemies you Kill Explode, dealing 5% of
 their Maximum Life as Lightning Damage which cannot Shock
 Corrupted"""
             )
+
+
+def test_sections():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, sections=("Build", "Tree"))
+    assert [section.tag for section in build.xml] == ["Build", "Tree"]
+    assert build.class_name == "Scion"
+    assert build.stats.life == 163
+    assert build.active_skill_tree.nodes[0] == 39085
+
+
+def test_tree_index(build):
+    tree = build.active_skill_tree
+    assert 39085 in tree
+    assert 1 not in tree
+    other = models.Tree(tree.url, tree.nodes[1:] + [1], {})
+    assert tree.diff(other) == (frozenset({1}), frozenset({39085}))
+    other.nodes = other.nodes + [5]
+    assert other.node_set == frozenset(other.nodes)
+    assert 5 in other
+
+
+def test_lazy():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, lazy=True)
+    assert build.level == 1
+    assert build.active_skill_tree.nodes[0] == 39085
+    assert list(build.xml._sections) == ["Build", "Tree"]
+    assert [section.tag for section in build.xml][-1] == "Config"
+
+
+@pytest.mark.parametrize(
+    "notes",
+    [
+        b"<![CDATA[</Notes>]]>",
+        b"<!-- </Notes> -->",
+        b"<?pi </Notes> ?>",
+        b"<Notes><!-- </Notes> --></Notes>",
+    ],
+    ids=["cdata", "comment", "pi", "nested"],
+)
+def test_lazy_skipped_markup(notes):
+    xml = (
+        b"<PathOfBuilding><Notes>"
+        + notes
+        + b'</Notes><Build level="7" className="Witch"/></PathOfBuilding>'
+    )
+    eager = api.PathOfBuildingAPI(xml)
+    lazy = api.PathOfBuildingAPI(xml, lazy=True)
+    assert list(lazy.xml.offsets) == ["Notes", "Build"]
+    assert lazy.level == eager.level == 7
+    assert lazy.class_name == eager.class_name == "Witch"
+
+
+def test_max_size():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, max_size=10**6)
+    assert build.class_name == "Scion"
+    assert build.items[0].name == "Inpulsa's Broken Heart"
+    build = api.from_import_code(code, sections=("Build",), max_size=10**6)
+    assert build.level == 1
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_reparse(lazy):
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    previous = api.PathOfBuildingAPI(xml, lazy=lazy)
+    items, stats_, trees = previous.items, previous.stats, previous.trees
+    edited = xml.replace(b'stat="Life" value="', b'stat="Life" value="1')
+    assert edited != xml
+    build = previous.reparse(edited)
+    assert build.items is items
+    assert build.trees is trees
+    assert "stats" not in build.__dict__
+    assert build.stats is not stats_
+    assert build.stats.life == float(f"1{stats_.life:g}")
+    assert build.level == previous.level
+    if lazy:
+        # Unchanged sections are not even parsed.
+        assert "Items" not in build.xml._sections
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_freeze(lazy):
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, lazy=lazy)
+    frozen = build.freeze()
+    assert build.xml is None
+    assert frozen.level == build.level == 1
+    assert frozen.items == tuple(build.items)
+    assert frozen.active_skill_tree == build.active_skill_tree
+    assert frozen.active_skill_tree is not build.active_skill_tree
+    assert frozen.stats.life == 163
+
+
+def test_freeze_sections():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, sections=("Build",))
+    frozen = build.freeze()
+    assert frozen.level == build.level == 1
+    assert frozen.items is None
+    assert frozen.active_item_set is None
+    with pytest.raises(AttributeError):
+        build.items
+
+
+def test_freeze_empty_notes():
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    xml = re.sub(rb"<Notes>.*</Notes>", b"<Notes></Notes>", xml, flags=re.S)
+    build = api.PathOfBuildingAPI(xml)
+    frozen = build.freeze()
+    assert frozen.notes is None
+    assert frozen.items == tuple(build.items)
+    with pytest.raises(AttributeError):
+        build.notes
+    assert snapshot.Snapshot.from_bytes(frozen.to_bytes()) == frozen
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_to_import_code(lazy):
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = api.from_import_code(code, lazy=lazy)
+    assert api.from_import_code(build.to_import_code()).items == build.items
+    skill = build.xml.find("Skills").find("Skill")
+    skill[0].set("level", "21")
+    build.xml.find("Config")[0].set("boolean", "false")
+    encoded = api.from_import_code(build.to_import_code(level=9))
+    assert encoded.skill_groups[0].abilities[0].level == 21
+    assert encoded.stats == build.stats
+    assert encoded.trees == build.trees
+    assert len(build.to_import_code(level=0)) > len(build.to_import_code(level=9))
+    build.freeze()
+    with pytest.raises(ValueError):
+        build.to_xml()
+
+
+def test_to_xml_lazy():
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    build = api.PathOfBuildingAPI(xml, lazy=True)
+    # Sections that were not parsed are copied verbatim.
+    assert build.to_xml() == xml
+    assert build.level == 1
+    assert api.PathOfBuildingAPI(build.to_xml()).level == 1
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_to_xml_sections(lazy):
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    build = api.PathOfBuildingAPI(xml, sections=("Build", "Tree"), lazy=lazy)
+    assert build.level == 1
+    serialized = build.to_xml()
+    assert [section.tag for section in fromstring(serialized)] == ["Build", "Tree"]
+    assert api.PathOfBuildingAPI(serialized).active_skill_tree.nodes[0] == 39085
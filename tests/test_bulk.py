@@ -0,0 +1,44 @@
+import pytest
+
+from pobapi import api, bulk
+
+FIELDS = ("class_name", "level", "stats", "active_skill_tree")
+
+
+@pytest.fixture(scope="module")
+def code():
+    with open("../data/test_code.txt") as f:
+        return f.read()
+
+
+def test_parse_many(code):
+    results = bulk.parse_many([code, "invalid", code], FIELDS, workers=2)
+    assert len(results) == 3
+    assert results[0] == results[2]
+    assert results[0].error is None
+    assert results[0].values["class_name"] == "Scion"
+    assert results[0].values["stats"].life == 163
+    assert results[0].values["active_skill_tree"].nodes[0] == 39085
+    assert results[1].values is None
+    assert results[1].error
+
+
+def test_parse_many_serial(code):
+    results = bulk.parse_many([code], FIELDS, workers=1)
+    assert results[0].values["level"] == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_parse(code, workers):
+    codes = [code, "invalid"] * 5
+    results = bulk.iter_parse(iter(codes), FIELDS, workers, chunksize=2, window=4)
+    assert list(results) == bulk.parse_many(codes, FIELDS, workers=1)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_encode(code, workers):
+    builds = [api.from_import_code(code, lazy=lazy) for lazy in (False, True)] * 3
+    codes = bulk.iter_encode(iter(builds), 1, workers, chunksize=2, window=4)
+    assert list(codes) == [build.to_import_code(1) for build in builds]
+    codes = bulk.encode_many(builds, workers=workers)
+    assert [api.from_import_code(c).level for c in codes] == [1] * 6
@@ -0,0 +1,95 @@
+import re
+import sqlite3
+
+import pytest
+
+from pobapi import api, cache, util
+
+
+@pytest.fixture(scope="module")
+def code():
+    with open("../data/test_code.txt") as f:
+        return f.read()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def build_cache(request, tmp_path):
+    if request.param == "memory":
+        return cache.MemoryCache()
+    return cache.SQLiteCache(str(tmp_path / "builds.sqlite"))
+
+
+def test_from_import_code(code, build_cache):
+    build = api.from_import_code(code, cache=build_cache)
+    cached = api.from_import_code(code, cache=build_cache)
+    assert len(build_cache) == 1
+    assert cached.xml is None
+    assert cached.class_name == build.class_name
+    assert cached.stats == build.stats
+    assert cached.items == build.items
+    assert cached.active_skill == build.active_skill
+    assert cached.config == build.config
+
+
+def test_sections(code, build_cache):
+    api.from_import_code(code, sections=("Build",), cache=build_cache)
+    cached = api.from_import_code(code, sections=("Build",), cache=build_cache)
+    assert cached.level == 1
+    assert "items" not in cached.__dict__
+
+
+def test_eviction(build_cache):
+    build_cache.max_size = 10
+    for key in (b"a", b"b", b"c"):
+        build_cache.set(key, b"1234")
+    assert build_cache.get(b"a") is None
+    assert build_cache.get(b"b") == b"1234"
+    build_cache.set(b"d", b"1234")
+    assert build_cache.get(b"b") == b"1234"
+    assert build_cache.get(b"c") is None
+
+
+def test_size(build_cache):
+    build_cache.max_size = 10
+    build_cache.set(b"a", b"1234")
+    build_cache.set(b"b", b"12")
+    assert build_cache.size == 6
+    build_cache.set(b"a", b"123")
+    assert build_cache.size == 5
+    build_cache.set(b"c", b"123456")
+    assert build_cache.size == 9
+    assert build_cache.get(b"b") is None
+    assert build_cache.get(b"a") == b"123"
+
+
+def test_reopen(tmp_path):
+    path = str(tmp_path / "builds.sqlite")
+    build_cache = cache.SQLiteCache(path)
+    build_cache.set(b"a", b"1234")
+    build_cache.close()
+    # Databases without a stored size get it calculated when they are opened.
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("DROP TABLE meta")
+    connection.close()
+    build_cache = cache.SQLiteCache(path, max_size=6)
+    assert build_cache.size == 4
+    build_cache.set(b"b", b"1234")
+    assert len(build_cache) == 1
+    assert build_cache.size == 4
+
+
+def test_failing_property(code, build_cache):
+    xml = util._fetch_xml_from_import_code(code)
+    code = util._encode_import_code(
+        re.sub(rb"<Notes>.*</Notes>", b"<Notes></Notes>", xml, flags=re.S)
+    )
+    build = api.from_import_code(code, cache=build_cache)
+    assert build.level == 1
+    cached = api.from_import_code(code, cache=build_cache)
+    assert cached.level == 1
+    assert cached.items == build.items
+    with pytest.raises(AttributeError):
+        build.notes
+    with pytest.raises(AttributeError):
+        cached.notes
@@ -0,0 +1,63 @@
+import pytest
+from lxml.etree import tostring
+
+from pobapi import api, compare, util
+
+
+@pytest.fixture(scope="module")
+def xml():
+    with open("../data/test_code.txt") as f:
+        return util._fetch_xml_from_import_code(f.read())
+
+
+def _modified(xml):
+    build = api.PathOfBuildingAPI(xml)
+    root = build.xml
+    root.find("Build").find("PlayerStat[@stat='Life']").set("value", "1234")
+    root.find("Skills").find("Skill").find("Gem").set("level", "21")
+    root.find("Items").find("ItemSet").find("Slot[@name='Boots']").set("itemId", "0")
+    return api.PathOfBuildingAPI(tostring(root))
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_unchanged(xml, lazy):
+    a = api.PathOfBuildingAPI(xml, lazy=lazy)
+    b = api.PathOfBuildingAPI(xml, lazy=lazy)
+    result = compare.diff(a, b)
+    assert not result
+    # Unchanged sections are skipped without computing properties.
+    assert "items" not in b.__dict__
+    assert "trees" not in b.__dict__
+
+
+def test_changed(xml):
+    a = api.PathOfBuildingAPI(xml)
+    b = _modified(xml)
+    result = compare.diff(a, b)
+    assert result.sections == {"stats", "skill_groups", "item_sets"}
+    assert result.stats["life"] == (a.stats.life, 1234)
+    assert [gem.level for gem in result.added_gems] == [21]
+    assert [gem.level for gem in result.removed_gems] == [20]
+    assert result.removed_gems[0].name == result.added_gems[0].name == "Arc"
+    # Item IDs do not follow the order of items.
+    assert a.items[1].name == "Abberath's Hooves"
+    assert result.item_sets == [{"boots": (a.items[1], None)}]
+    assert not result.added_items and not result.removed_items
+    assert not any(result.trees)
+    assert not result.config
+
+
+def test_trees():
+    a = compare.models.Tree("", [1, 2, 3], {4: 1})
+    b = compare.models.Tree("", [2, 3, 5], {4: 2, 6: 3})
+    result = compare._diff_trees(a, b)
+    assert result.added_nodes == {5}
+    assert result.removed_nodes == {1}
+    assert result.sockets == {4: (1, 2), 6: (None, 3)}
+    assert compare._diff_trees(None, a).added_nodes == {1, 2, 3}
+
+
+def test_multisets():
+    added, removed = compare._diff_multisets([1, 2, 2, [3]], [[3], 2, 4])
+    assert added == [4]
+    assert removed == [1, 2]
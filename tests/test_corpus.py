@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from pobapi import corpus, util
+
+
+@pytest.fixture(scope="module")
+def xml():
+    with open("../data/test_code.txt") as f:
+        return util._fetch_xml_from_import_code(f.read())
+
+
+@pytest.fixture
+def path(xml, tmp_path):
+    path = str(tmp_path / "builds.corpus")
+    with corpus.CorpusWriter(path) as writer:
+        assert writer.append(xml) == 0
+        writer.extend([b"<PathOfBuilding/>", xml])
+        assert len(writer) == 3
+    return path
+
+
+def _class_name(args):
+    path, record = args
+    with corpus.Corpus(path) as builds:
+        return builds.build(record, lazy=True).class_name
+
+
+def test_read(xml, path):
+    with corpus.Corpus(path) as builds:
+        assert len(builds) == 3
+        assert builds[0] == xml
+        assert isinstance(builds[0], memoryview)
+        assert builds[1] == b"<PathOfBuilding/>"
+        assert builds[-1] == xml
+        assert [bytes(record) for record in builds] == [xml, b"<PathOfBuilding/>", xml]
+        with pytest.raises(IndexError):
+            builds[3]
+        build = builds.build(2)
+        lazy = builds.build(0, lazy=True)
+        sections = builds.build(0, sections=("Build",))
+    # Builds outlive the corpus they were read from.
+    assert build.items[0].name == "Inpulsa's Broken Heart"
+    assert lazy.stats.life == sections.stats.life == 163
+
+
+def test_append(xml, path):
+    with corpus.Corpus(path) as builds:
+        record = builds[0]
+        writer = corpus.CorpusWriter(path)
+        assert writer.append(xml) == 3
+        # Appended documents are visible after flushing.
+        assert len(builds) == 3
+        writer.flush()
+        assert bytes(builds[3]) == xml
+        assert len(builds) == 4
+        writer.close()
+        assert record == xml
+
+
+def test_interrupted_writer(xml, path):
+    with open(path, "ab") as f:
+        f.write(b"<PathOf")
+    with open(path + ".idx", "ab") as f:
+        f.write(b"\0" * 7)
+    with corpus.CorpusWriter(path) as writer:
+        assert writer.append(xml) == 3
+    with corpus.Corpus(path) as builds:
+        assert len(builds) == 4
+        assert builds[3] == xml
+
+
+def test_empty(tmp_path):
+    with corpus.Corpus(str(tmp_path / "missing.corpus")) as builds:
+        assert len(builds) == 0
+        assert list(builds) == []
+
+
+def test_processes(path):
+    with ProcessPoolExecutor(2) as executor:
+        names = list(executor.map(_class_name, [(path, 0), (path, 2)] * 2))
+    assert names == ["Scion"] * 4
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pobapi
+
+#: Environment of fresh interpreters, importing pobapi from this source tree.
+ENV = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pobapi.__file__)))
+#: Cumulative import time budget of pobapi and its submodules, in microseconds.
+IMPORT_BUDGET = {"pobapi": 50_000, "pobapi.api": 250_000}
+#: Modules that must not be imported by the statement.
+DEFERRED = {
+    "import pobapi": ("lxml", "requests", "unstdlib", "asyncio", "pobapi.constants"),
+    "import pobapi.api": ("requests", "asyncio", "pobapi.cache", "pobapi.config"),
+}
+
+
+def _import_times(statement):
+    """Run a statement in a fresh interpreter with -X importtime.
+
+    :return: Dictionary of {<module> : <cumulative import time in microseconds>}."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=ENV,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("statement", list(DEFERRED))
+def test_deferred_imports(statement):
+    times = _import_times(statement)
+    module = statement.split()[-1]
+    assert times[module] < IMPORT_BUDGET[module]
+    for deferred in DEFERRED[statement]:
+        assert deferred not in times
+
+
+def test_from_import_code_without_requests():
+    statement = (
+        "import sys, pobapi\n"
+        "with open('../data/test_code.txt') as f:\n"
+        "    assert pobapi.from_import_code(f.read()).items\n"
+        "assert 'requests' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", statement], check=True, env=ENV)
+
+
+def test_exports():
+    for name, module in pobapi._EXPORTS.items():
+        assert name in getattr(pobapi, module).__all__
+        assert getattr(pobapi, name) is getattr(getattr(pobapi, module), name)
+    for module in set(pobapi._EXPORTS.values()):
+        assert set(getattr(pobapi, module).__all__) <= set(pobapi.__all__)
+    assert "from_import_code" in dir(pobapi)
+    with pytest.raises(AttributeError):
+        pobapi.unknown
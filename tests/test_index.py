@@ -0,0 +1,98 @@
+import pytest
+
+from pobapi import api, index
+
+
+@pytest.fixture(scope="module")
+def build():
+    with open("../data/test_code.txt") as f:
+        return api.from_import_code(f.read())
+
+
+def _index(build):
+    result = index.BuildIndex()
+    other = api.PathOfBuildingAPI.__new__(api.PathOfBuildingAPI)
+    other.__dict__.update(
+        class_name="Witch",
+        ascendancy_name=None,
+        skill_groups=[],
+        keystones=build.keystones,
+        items=build.items[:1],
+        active_skill_tree=build.active_skill_tree,
+    )
+    assert result.add(build) == 0
+    assert result.add(other) == 1
+    result.extend([build, other])
+    return result
+
+
+def test_queries(build):
+    build_index = _index(build)
+    assert len(build_index) == 4
+    assert build_index.all_of(("class", "Scion")) == [0, 2]
+    assert build_index.all_of(("ascendancy", None)) == [1, 3]
+    assert build_index.all_of(("gem", "Arc"), ("support_level", 20)) == [0, 2]
+    assert build_index.all_of(("gem", "Arc"), ("class", "Witch")) == []
+    assert build_index.all_of(("unique", "Abberath's Hooves")) == [0, 2]
+    assert build_index.all_of(("keystone", "elemental_equilibrium")) == [0, 1, 2, 3]
+    assert build_index.any_of(("class", "Witch"), ("gem", "Arc")) == [0, 1, 2, 3]
+    assert build_index.any_of(("gem", "Unknown")) == []
+    assert build_index.all_of() == [0, 1, 2, 3]
+    assert ("node", build.active_skill_tree.nodes[0]) in build_index
+    combined = build_index.postings("class", "Witch") | build_index.postings(
+        "gem", "Arc"
+    )
+    assert list(build_index.ids(combined)) == [0, 1, 2, 3]
+
+
+def test_persistence(build, tmp_path):
+    build_index = _index(build)
+    path = str(tmp_path / "builds.index")
+    build_index.save(path)
+    loaded = index.BuildIndex.load(path)
+    assert len(loaded) == len(build_index)
+    assert loaded.terms() == build_index.terms()
+    for term in build_index.terms():
+        assert loaded.postings(*term) == build_index.postings(*term)
+    # Builds can still be added after loading.
+    loaded.add(build)
+    assert loaded.all_of(("class", "Scion")) == [0, 2, 4]
+
+
+def test_ids():
+    ids = [0, 5, 63, 64, 1000]
+    assert list(index.BuildIndex.ids(sum(1 << i for i in ids))) == ids
+    assert list(index.BuildIndex.ids(0)) == []
+
+
+def test_representations(build):
+    build_index = _index(build)
+    assert build_index.count("class", "Witch") == 2
+    # Every term is contained in more than 1 of 32 builds, so all are bitmaps.
+    assert isinstance(build_index._postings[("class", "Witch")], int)
+    build_index.extend([build] * 60)
+    assert build_index.count("class", "Scion") == 62
+    assert isinstance(build_index._postings[("class", "Scion")], int)
+    # Terms become sorted arrays once few builds contain them.
+    assert isinstance(build_index._postings[("class", "Witch")], index.array)
+    assert build_index.postings("class", "Witch") == 0b1010
+    assert build_index.all_of(("class", "Witch")) == [1, 3]
+    assert build_index.all_of(("class", "Scion"), ("class", "Witch")) == []
+    assert build_index.all_of(("class", "Witch"), ("ascendancy", None)) == [1, 3]
+    assert build_index.any_of(("class", "Witch"), ("gem", "Unknown")) == [1, 3]
+
+
+def test_persistence_sparse(build, tmp_path):
+    build_index = _index(build)
+    build_index.extend([build] * 60)
+    path = str(tmp_path / "builds.index")
+    build_index.save(path)
+    loaded = index.BuildIndex.load(path)
+    assert isinstance(loaded._postings[("class", "Scion")], int)
+    assert isinstance(loaded._postings[("class", "Witch")], index.array)
+    for term in build_index.terms():
+        assert loaded.postings(*term) == build_index.postings(*term)
+        assert loaded.count(*term) == build_index.count(*term)
+    loaded.add(build)
+    assert loaded.all_of(("class", "Witch")) == [1, 3]
+    assert loaded.count("class", "Scion") == 63
@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from pobapi import __main__
+
+
+@pytest.fixture(scope="module")
+def code():
+    with open("../data/test_code.txt") as f:
+        return f.read().strip()
+
+
+@pytest.fixture
+def corpus(code, tmp_path):
+    (tmp_path / "codes.txt").write_text(f"{code}\n\ninvalid\n")
+    with gzip.open(tmp_path / "codes.jsonl.gz", "wt") as f:
+        f.write(json.dumps({"import_code": code}) + "\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_scan_jsonl(corpus, capsys, workers):
+    assert __main__.main(["scan", str(corpus), "-w", workers, "--chunksize", "1"]) == 0
+    out, err = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [record["source"] for record in records] == [
+        f"{corpus / 'codes.jsonl.gz'}:1",
+        f"{corpus / 'codes.txt'}:1",
+        f"{corpus / 'codes.txt'}:3",
+    ]
+    assert {**records[0], "source": None} == {**records[1], "source": None}
+    assert records[0]["class_name"] == "Scion"
+    assert records[0]["level"] == 1
+    assert records[0]["stats"]["life"] == 163
+    assert records[0]["keystones"] == ["elemental_equilibrium"]
+    assert "error" in records[2]
+    assert "Parsed 3 import codes (1 failed)" in err
+
+
+def test_scan_csv(corpus, tmp_path, capsys):
+    output = tmp_path / "builds.csv"
+    args = ["scan", str(corpus / "codes.txt"), "-w", "1", "-f", "csv", "-q"]
+    args += ["-o", str(output), "--fields", "level,stats", "--stats", "life,mana"]
+    assert __main__.main(args) == 0
+    assert capsys.readouterr() == ("", "")
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ["source", "level", "life", "mana", "error"]
+    assert rows[0]["life"] == "163.0"
+    assert rows[1]["error"]
+
+
+def test_scan_stdin(code, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO(code + "\n"))
+    assert __main__.main(["scan", "-w", "1", "--fields", "class_name", "-q"]) == 0
+    assert json.loads(capsys.readouterr().out) == {
+        "source": "<stdin>:1",
+        "class_name": "Scion",
+    }
+
+
+def test_scan_invalid_lines(code, tmp_path, capsys):
+    lines = [json.dumps({"import_code": code}), '{"code": "x"}', "{", "[1]", "5"]
+    (tmp_path / "codes.jsonl").write_text("\n".join(lines))
+    assert __main__.main(["scan", str(tmp_path), "-w", "1", "--fields", "level"]) == 0
+    out, err = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert records[0] == {"source": f"{tmp_path / 'codes.jsonl'}:1", "level": 1}
+    assert [record["source"][-1] for record in records] == ["1", "2", "3", "4", "5"]
+    assert records[1]["error"] == "KeyError: 'import_code'"
+    assert records[2]["error"].startswith("Invalid JSON")
+    assert all("level" not in record for record in records[1:])
+    assert "Parsed 5 import codes (4 failed)" in err
+
+
+def test_scan_unknown_fields(capsys):
+    with pytest.raises(SystemExit):
+        __main__.main(["scan", "--fields", "unknown"])
+    with pytest.raises(SystemExit):
+        __main__.main(["scan", "--stats", "unknown"])
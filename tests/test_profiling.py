@@ -0,0 +1,54 @@
+import threading
+
+from pobapi import api, profiling
+
+
+def test_profile():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    records = []
+    with profiling.Profile(lambda *record: records.append(record)) as profile:
+        build = api.from_import_code(code)
+        build.items
+        build.items
+        build.active_skill_tree
+    summary = profile.summary()
+    for stage in ("base64", "zlib", "parse", "tree_decode", "property.items"):
+        assert summary[stage]["calls"] >= 1
+        assert summary[stage]["seconds"] >= 0
+    assert summary["property.items"]["calls"] == 1
+    assert len(records) == sum(stage["calls"] for stage in summary.values())
+    metrics = profile.to_prometheus()
+    assert 'pobapi_stage_seconds_total{stage="property.items"}' in metrics
+    assert "# TYPE pobapi_stage_calls_total counter" in metrics
+    assert not profiling._profiles
+    api.from_import_code(code).items
+    assert profile.summary() == summary
+
+
+def test_prometheus_gauge():
+    profile = profiling.Profile()
+    profile.record("parse", 0.5, -3)
+    metrics = profile.to_prometheus()
+    assert "# TYPE pobapi_stage_allocated_blocks gauge" in metrics
+    assert 'pobapi_stage_allocated_blocks{stage="parse"} -3' in metrics
+    assert "allocated_blocks_total" not in metrics
+
+
+def test_record_threads():
+    profile = profiling.Profile()
+
+    def record():
+        for _ in range(10000):
+            profile.record("parse", 1.0, 1)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profile.summary()["parse"] == {
+        "calls": 40000,
+        "seconds": 40000.0,
+        "allocated_blocks": 40000,
+    }
@@ -0,0 +1,74 @@
+from dataclasses import replace
+
+import pytest
+
+from pobapi import api, models, similarity, snapshot
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def builds():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    build = snapshot.Snapshot.from_build(api.from_import_code(code))
+    tree = build.active_skill_tree
+    other = models.Tree(tree.url, [node + 1 for node in tree.nodes], tree.sockets)
+    return [
+        build,
+        replace(build, stats=replace(build.stats, life=5000)),
+        replace(build, active_skill_tree=other, skill_gems=()),
+        replace(build, stats=replace(build.stats, life=170)),
+    ]
+
+
+def test_from_builds(builds):
+    index = similarity.SimilarityIndex.from_builds(builds)
+    assert len(index) == 4
+    assert index.features.dtype == np.float32
+    assert index.signatures.shape == (4, 64)
+    assert np.allclose(np.linalg.norm(index.features, axis=1), 1)
+    assert (index.signatures[0] == index.signatures[1]).all()
+    assert not (index.signatures[0] == index.signatures[2]).any()
+
+
+@pytest.mark.parametrize("exact", [False, True], ids=["lsh", "exact"])
+def test_nearest(builds, exact):
+    index = similarity.SimilarityIndex.from_builds(builds)
+    rows, scores = index.nearest(builds[0], k=2, exact=exact)
+    assert rows.tolist() == [0, 3]
+    assert scores[0] == pytest.approx(1)
+    assert scores[0] >= scores[1]
+    # Build 2 has the same stats, but shares no gems or nodes with build 0,
+    # so it is no candidate of approximate searches.
+    rows, _ = index.nearest(0, k=2, exact=exact)
+    assert rows.tolist() == ([3, 2] if exact else [3, 1])
+
+
+def test_nearest_fallback(builds):
+    index = similarity.SimilarityIndex.from_builds(builds)
+    # Only builds sharing gems and nodes are candidates, so all are scored.
+    rows, _ = index.nearest(0, k=10)
+    assert rows.tolist() == index.nearest(0, k=10, exact=True)[0].tolist()
+    assert sorted(rows.tolist()) == [1, 2, 3]
+
+
+def test_save_load(builds, tmp_path):
+    index = similarity.SimilarityIndex.from_builds(builds, num_perm=32, bands=8)
+    index.save(str(tmp_path))
+    loaded = similarity.SimilarityIndex.load(str(tmp_path))
+    assert isinstance(loaded.features, np.memmap)
+    assert loaded.columns == index.columns
+    for name in ("features", "signatures", "keys", "order"):
+        assert (getattr(loaded, name) == getattr(index, name)).all()
+    for query in (builds[1], 2):
+        for a, b in zip(loaded.nearest(query, k=3), index.nearest(query, k=3)):
+            assert a.tolist() == b.tolist()
+
+
+def test_bands(builds):
+    with pytest.raises(ValueError):
+        similarity.SimilarityIndex.from_builds(builds, num_perm=64, bands=5)
+    index = similarity.SimilarityIndex.from_builds([])
+    assert len(index) == 0
+    assert index.nearest(builds[0])[0].tolist() == []
@@ -0,0 +1,90 @@
+import pickle
+from dataclasses import replace
+
+import pytest
+
+from pobapi import api, models, snapshot
+
+
+@pytest.fixture(scope="module")
+def build():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    return api.from_import_code(code)
+
+
+def test_round_trip(build):
+    frozen = snapshot.Snapshot.from_build(build)
+    data = frozen.to_bytes()
+    restored = snapshot.Snapshot.from_bytes(data)
+    assert restored == frozen
+    assert restored.active_skill_group is restored.skill_groups[0]
+    assert restored.stats.life == 163
+    assert restored.config.enemy_boss == "Shaper"
+    assert restored.config.enemy_level == build.config.enemy_level
+    assert len(data) < len(pickle.dumps(frozen, pickle.HIGHEST_PROTOCOL)) / 2
+
+
+def test_immutable(build):
+    frozen = snapshot.Snapshot.from_build(build)
+    with pytest.raises(AttributeError):
+        frozen.level = 2
+
+
+def test_version(build):
+    data = snapshot.Snapshot.from_build(build).to_bytes()
+    with pytest.raises(ValueError):
+        snapshot.Snapshot.from_bytes(b"\x00" + data[1:])
+
+
+@pytest.mark.parametrize(
+    "value",
+    [None, True, False, 0, -1, 2**70, 0.5, 1.0, -3.0, 0.1, 1e300, "", "Ünïcode"],
+)
+def test_values(value):
+    restored = snapshot._loads(snapshot._dumps(value))
+    assert restored == value
+    assert type(restored) is type(value)
+
+
+def test_missing(build):
+    frozen = snapshot.Snapshot.from_build(
+        api.PathOfBuildingAPI(build.to_xml(), sections=("Build", "Skills"))
+    )
+    assert frozen.trees is None
+    assert frozen.active_skill_tree is None
+    assert frozen.active_skill_group is frozen.skill_groups[0]
+    restored = snapshot.Snapshot.from_bytes(frozen.to_bytes())
+    assert restored == frozen
+    assert restored.active_item_set is None
+
+
+def test_independent():
+    with open("../data/test_code.txt") as f:
+        build = api.from_import_code(f.read())
+    frozen = snapshot.Snapshot.from_build(build)
+    frozen.stats.life = 1
+    frozen.skill_groups[0].abilities.clear()
+    assert build.stats.life == 163
+    assert build.skill_groups[0].abilities
+    assert frozen.active_skill_group is frozen.skill_groups[0]
+
+
+def test_unmatched_references(build):
+    frozen = snapshot.Snapshot.from_build(build)
+    tree = models.Tree("url", [1, 2], {})
+    derived = replace(frozen, active_skill_tree=tree, skill_groups=())
+    restored = snapshot.Snapshot.from_bytes(derived.to_bytes())
+    assert restored == derived
+    assert restored.active_skill_tree == tree
+    assert restored.active_skill_group == frozen.active_skill_group
+    assert restored.active_item_set is restored.item_sets[0]
+
+
+def test_truncated(build):
+    data = snapshot.Snapshot.from_build(build).to_bytes()
+    for size in (1, 2, len(data) // 2, len(data) - 1):
+        with pytest.raises(ValueError):
+            snapshot.Snapshot.from_bytes(data[:size])
+    with pytest.raises(ValueError):
+        snapshot._loads(snapshot._dumps(0.5)[:-1])
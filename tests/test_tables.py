@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from pobapi import api, tables
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def build():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    return api.from_import_code(code)
+
+
+def test_stats_matrix(build):
+    matrix = tables.stats_matrix([build, build])
+    assert matrix.shape == (2, len(tables.STAT_COLUMNS))
+    assert matrix.dtype == np.float64
+    life = tables.STAT_COLUMNS.index("life")
+    assert matrix[1, life] == 163
+    assert math.isnan(matrix[0, tables.STAT_COLUMNS.index("bleed_dps")])
+
+
+def test_stats_table(build):
+    table = tables.StatsTable.from_builds([build] * 3, ("life", "mana", "total_dps"))
+    assert len(table) == 3
+    assert list(table["mana"]) == [60, 60, 60]
+    assert table.percentile("life", 50) == 163
+    assert tables.stats_matrix([]).shape == (0, len(tables.STAT_COLUMNS))
+
+
+def test_tree_nodes(build):
+    tree = build.active_skill_tree
+    assert tables.tree_nodes(tree.url).tolist() == tree.nodes
+
+
+def test_node_matrix(build):
+    nodes = (39085, 1, 63976)
+    matrix = tables.node_matrix(build.trees * 2, nodes)
+    assert matrix.tolist() == [[True, False, True]] * 2 * len(build.trees)
+
+
+def test_item_table(build):
+    table = tables.ItemTable.from_builds([build, build])
+    assert len(table) == 2 * len(build.items)
+    assert table["build"].tolist() == [0, 0, 1, 1]
+    assert table["socket_count"].tolist() == [6, 4] * 2
+    assert table["link_count"].tolist() == [3, 4] * 2
+    assert table["quality"].dtype == np.int16
+    assert table.categories["rarity"] == ("Unique",)
+    for view, item in zip(table, build.items * 2):
+        assert view.to_item() == item
+        assert view.name == item.name
+        assert view.sockets == item.sockets
+        assert str(view) == str(item)
+    assert table[-1].base == "Goathide Boots"
+    with pytest.raises(IndexError):
+        table[4]
+    with pytest.raises(AttributeError):
+        table[0].unknown
+
+
+def test_item_table_filter(build):
+    table = tables.ItemTable.from_builds([build] * 3)
+    shaper = table[table["shaper"]]
+    assert len(shaper) == 3
+    assert {view.name for view in shaper} == {"Inpulsa's Broken Heart"}
+    assert shaper["build"].tolist() == [0, 1, 2]
+    mask = (table["link_count"] >= 4) & table.isin("rarity", ["Unique", "Rare"])
+    assert [view.to_item() for view in table[mask]] == [build.items[1]] * 3
+    assert len(table[table.isin("base", ["Unknown"])]) == 0
+    assert table[1:3][1].to_item() == build.items[0]
+    empty = tables.ItemTable.from_items([])
+    assert len(empty) == 0
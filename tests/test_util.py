@@ -0,0 +1,222 @@
+import base64
+import decimal
+import itertools
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pobapi import api, util
+from pobapi.snapshot import Snapshot
+
+ITEM_STATS = (
+    "Rarity: ",
+    "Unique ID: ",
+    "Shaper Item",
+    "Elder Item",
+    "{crafted}",
+    "Quality: ",
+    "Sockets: ",
+    "LevelReq: ",
+    "Item Level: ",
+    "Implicits: ",
+)
+
+
+@pytest.fixture(scope="module")
+def item_texts():
+    texts = []
+    for path in ("../data/test_code.txt", "../data/import_code.txt"):
+        with open(path) as f:
+            build = api.from_import_code(f.read())
+        for item in build.xml.find("Items").findall("Item"):
+            texts.append(item.text.strip("\n\r\t").splitlines())
+    return texts
+
+
+def test_get_stats(item_texts):
+    extra = ["Rarity: RARE", "Name", "Base", "Quality: 5", "Elder Item", "Quality: 9"]
+    for text in item_texts + [extra]:
+        stats = util._get_stats(text)
+        for stat in ITEM_STATS:
+            assert stats.get(stat) == util._get_stat(text, stat)
+
+
+def _calculate_mod_text_decimal(line, value):
+    """Reference implementation based on decimal rounding."""
+    start, stop = line.partition("(")[-1].partition(")")[0].split("-")
+    width = float(stop) - float(start) + 1
+    offset = decimal.Decimal(width * value).to_integral(decimal.ROUND_HALF_DOWN)
+    result = float(start) + float(offset)
+    replace_string = f"({start}-{stop})"
+    result_string = f"{result if result % 1 else int(result)}"
+    return line.replace(replace_string, result_string)
+
+
+def _reference_mod_text(line, value):
+    while "(" in line:
+        line = _calculate_mod_text_decimal(line, value)
+    return line
+
+
+def _mod_ranges():
+    rng = random.Random(0)
+    for _ in range(5000):
+        start = rng.randint(0, 300)
+        stop = start + rng.randint(0, 300)
+        # Values exactly halfway between two offsets exercise the rounding mode.
+        tie = (rng.randint(0, stop - start) + 0.5) / (stop - start + 1)
+        for value in (rng.random(), tie, 0.0, 0.5, 1.0):
+            yield f"({start}-{stop})", value
+    for start, stop in (("0.2", "0.4"), ("1.5", "3")):
+        for value in (0.0, 0.25, 0.5, 0.75, 1.0):
+            yield f"({start}-{stop})", value
+
+
+@pytest.mark.parametrize("template", ["+{} to maximum Life", "Adds {} to {} Damage"])
+def test_calculate_mod_text(template):
+    for mod_range, value in _mod_ranges():
+        line = template.format(mod_range, mod_range.replace("(", "(1"))
+        expected = _reference_mod_text(line, value)
+        assert util._calculate_mod_text(line, value) == expected, (line, value)
+
+
+def test_calculate_mod_text_negative():
+    assert util._calculate_mod_text("(-5--1) Damage", 0.5) == "(-5--1) Damage"
+    assert (
+        util._calculate_mod_text("Gain (5-10) Rage (max)", 0.5) == "Gain 8 Rage (max)"
+    )
+
+
+def test_parse_import_code():
+    with open("../data/import_code.txt") as f:
+        code = f.read()
+    xml = util._fetch_xml_from_import_code(code)
+    assert b"".join(util._iter_import_code(code, chunk_size=100)) == xml
+    assert util._fetch_xml_from_import_code(code, max_size=len(xml)) == xml
+    assert util._fetch_xml_from_import_code(code, max_size=len(xml) - 1) is None
+    assert util._parse_import_code(code, max_size=len(xml) - 1) is None
+    root = util._parse_import_code(code, len(xml), ("Build",))
+    assert [section.tag for section in root] == ["Build"]
+
+
+def test_decompression_bomb():
+    xml = b"<PathOfBuilding>" + b"<Build/>" * 10**7
+    bomb = base64.urlsafe_b64encode(zlib.compress(xml, 9)).decode()
+    chunks = util._iter_import_code(bomb, max_size=10**6)
+    with pytest.raises(ValueError):
+        for chunk in chunks:
+            assert len(chunk) <= 2**16
+    with pytest.raises(ValueError):
+        api.from_import_code(bomb, max_size=10**6)
+
+
+def test_intern(monkeypatch):
+    monkeypatch.setattr(util, "_VOCABULARY", dict(util._VOCABULARY))
+    assert util._intern(None) is None
+    assert util._intern("".join(["Un", "ique"])) is util._VOCABULARY["Unique"]
+    value = "".join(["Test", " Gem"])
+    assert util._intern(value) is value
+    assert util._intern("".join(["Test", " Gem"])) is value
+    monkeypatch.setattr(util, "_VOCABULARY_SIZE", len(util._VOCABULARY))
+    value = "".join(["Other", " Gem"])
+    assert util._intern(value) is value
+    assert value not in util._VOCABULARY
+
+
+def test_shared_strings():
+    with open("../data/test_code.txt") as f:
+        code = f.read()
+    a = api.from_import_code(code)
+    b = api.from_import_code(code)
+    assert a.class_name is b.class_name
+    assert a.skill_gems[0].name is b.skill_gems[0].name
+    assert a.items[0].base is b.items[0].base
+    assert a.items[0].rarity is b.items[0].rarity
+    snapshot = Snapshot.from_bytes(Snapshot.from_build(a).to_bytes())
+    assert snapshot.skill_gems[0].name is a.skill_gems[0].name
+
+
+def test_magic_names_not_shared():
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    name = "Goathide Boots of the Whale"
+    xml = xml.replace(
+        b"Rarity: UNIQUE\nAbberath&apos;s Hooves\nGoathide Boots",
+        b"Rarity: MAGIC\n" + name.encode(),
+    )
+    item = api.PathOfBuildingAPI(xml).items[1]
+    assert item.rarity == "Magic"
+    assert item.base == name
+    assert name not in util._VOCABULARY
+
+
+class _Counter:
+    def __init__(self, delay=0.01, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    @util.memoized_property
+    def value(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError("Failed.")
+        return object()
+
+
+def _run_threads(function, threads=32):
+    barrier = threading.Barrier(threads)
+
+    def run():
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(threads) as executor:
+        futures = [executor.submit(run) for _ in range(threads)]
+    return [future.exception() or future.result() for future in futures]
+
+
+def test_memoized_property_threads():
+    counter = _Counter()
+    results = _run_threads(lambda: counter.value)
+    assert counter.calls == 1
+    assert all(result is counter.value for result in results)
+    assert not util._pending
+
+
+def test_memoized_property_error():
+    counter = _Counter(fail=True)
+    results = _run_threads(lambda: counter.value)
+    assert counter.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not util._pending
+    counter.fail = False
+    assert counter.value is counter.value
+    assert counter.calls == 2
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_shared_build_threads(lazy):
+    with open("../data/test_code.txt") as f:
+        xml = util._fetch_xml_from_import_code(f.read())
+    names = list(api._SECTIONS)
+    for _ in range(5):
+        build = api.PathOfBuildingAPI(xml, lazy=lazy)
+        counter = itertools.count()
+
+        def access():
+            # Every thread touches all properties, starting at a different one.
+            start = next(counter)
+            order = names[start % len(names) :] + names[: start % len(names)]
+            return {name: getattr(build, name) for name in order}
+
+        results = _run_threads(access)
+        # Values computed more than once would be equal, but not identical.
+        for result in results:
+            for name in names:
+                assert result[name] is getattr(build, name)